@@ -0,0 +1,167 @@
+# backend/cli.py
+"""
+Offline bulk rejection pipeline: analyze -> email -> (optional) video.
+
+    uv run python cli.py --input pairs.jsonl --output results.jsonl
+    uv run python cli.py --job-key <job_key> --output results.jsonl --concurrency 10 --video
+
+Input is a JSONL or CSV file with `profile_key` and `job_key` fields, or every
+profile of the HRFlow source against --job-key. Each result is appended to the
+output JSONL as soon as it completes, and the output doubles as the checkpoint:
+re-running with the same file skips every pair already written successfully.
+"""
+import os
+import csv
+import json
+import asyncio
+import argparse
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+
+from services import hrflow, llm, video
+from services.pipeline import finish_analysis
+
+
+def read_pairs(path: str) -> list[tuple[str, str]]:
+    """Read (profile_key, job_key) pairs from a JSONL or CSV file."""
+    with open(path, newline="") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.DictReader(f))
+        else:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["profile_key"], row["job_key"]) for row in rows]
+
+
+def read_checkpoint(path: str) -> set[tuple[str, str]]:
+    """Pairs already completed in a previous run of the same output file."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # torn last line from a crash
+            if record.get("status") == "ok":
+                done.add((record["profile_key"], record["job_key"]))
+    return done
+
+
+async def run(pairs: list[tuple[str, str]], output: str, concurrency: int, roast_mode: bool, deterministic: bool, with_video: bool):
+    done = read_checkpoint(output)
+    todo = [pair for pair in dict.fromkeys(pairs) if pair not in done]
+    print(f"{len(pairs)} pairs, {len(pairs) - len(todo)} already done, {len(todo)} to process")
+
+    # Each job is fetched once per run; its candidates are fetched and skill-analyzed in chunks
+    by_job: dict[str, list[str]] = {}
+    for profile_key, job_key in todo:
+        by_job.setdefault(job_key, []).append(profile_key)
+    chunk_size = int(os.getenv("BATCH_CHUNK_SIZE", "50"))
+
+    # Prepared analyses wait here for a worker; bounded so fetching stays about a chunk ahead
+    prepared: asyncio.Queue = asyncio.Queue(maxsize=chunk_size)
+    counts = {"ok": 0, "error": 0}
+
+    async def prepare():
+        for job_key, profile_keys in by_job.items():
+            try:
+                job = hrflow.get_compiled_job(job_key, await hrflow.get_job(job_key))
+            except Exception as e:
+                for profile_key in profile_keys:
+                    await prepared.put((profile_key, job_key, e))
+                continue
+
+            for start in range(0, len(profile_keys), chunk_size):
+                chunk = profile_keys[start:start + chunk_size]
+                try:
+                    scores = await asyncio.gather(*[hrflow.score_profile(profile_key, job_key) for profile_key in chunk])
+                    items = await hrflow.prepare_analyses(job, chunk, dict(zip(chunk, scores)))
+                except Exception as e:
+                    items = [(profile_key, e) for profile_key in chunk]
+                for profile_key, analysis in items:
+                    await prepared.put((profile_key, job_key, analysis))
+
+        # One stop marker per worker
+        for _ in range(concurrency):
+            await prepared.put(None)
+
+    async def process(analysis) -> dict:
+        if isinstance(analysis, BaseException):
+            raise analysis
+        result = await finish_analysis(analysis, roast_mode=roast_mode, deterministic=deterministic)
+
+        if with_video:
+            video_url, error = await video.generate_avatar_video(result.email, result.detectedLanguage)
+            if error:
+                raise RuntimeError(error)
+            result.videoUrl = video_url
+
+        return jsonable_encoder(result)
+
+    with open(output, "a") as out:
+        async def worker():
+            while True:
+                item = await prepared.get()
+                if item is None:
+                    return
+
+                profile_key, job_key, analysis = item
+                record = {"profile_key": profile_key, "job_key": job_key}
+                try:
+                    record.update(status="ok", result=await process(analysis))
+                except HTTPException as e:
+                    record.update(status="error", error=e.detail)
+                except Exception as e:
+                    record.update(status="error", error=str(e))
+
+                # One line per pair, flushed right away so a crash loses at most in-flight work
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                counts[record["status"]] += 1
+                finished = counts["ok"] + counts["error"]
+                if finished % 50 == 0 or finished == len(todo):
+                    print(f"{finished}/{len(todo)} done ({counts['error']} errors)")
+
+        await asyncio.gather(prepare(), *[worker() for _ in range(concurrency)])
+
+    print(f"Finished: {counts['ok']} ok, {counts['error']} errors -> {output}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Bulk candidate analysis and rejection emails")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--input", help="JSONL or CSV file with profile_key and job_key")
+    source.add_argument("--job-key", help="Analyze every profile of HRFLOW_SOURCE_KEY against this job")
+    parser.add_argument("--output", required=True, help="Results JSONL (also the resume checkpoint)")
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("BATCH_CONCURRENCY", "5")))
+    parser.add_argument("--roast", action="store_true", help="Generate roast emails")
+    parser.add_argument("--deterministic", action="store_true", help="Temperature-0, cached emails")
+    parser.add_argument("--video", action="store_true", help="Also render a HeyGen video per candidate")
+    args = parser.parse_args()
+
+    hrflow.init_client()
+    llm.init_client()
+    try:
+        # Bring the local replica (if configured) up to date so the sweep reads profiles locally
+        synced = await hrflow.sync_replica()
+        if synced:
+            print(f"Replica synced: {synced['profiles']} profiles, {synced['jobs']} jobs updated")
+
+        if args.input:
+            pairs = read_pairs(args.input)
+        else:
+            pairs = [(profile_key, args.job_key) for profile_key in await hrflow.list_profile_keys()]
+
+        await run(pairs, args.output, args.concurrency, args.roast, args.deterministic, args.video)
+    finally:
+        await video.close_client()
+        await llm.close_client()
+        hrflow.close_client()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    asyncio.run(main())
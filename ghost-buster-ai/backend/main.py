@@ -1,16 +1,41 @@
 # backend/main.py
+import asyncio
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routers import analysis, chat
+from routers import analysis, chat, webhooks
+from services import hrflow, llm, metrics, video
+from services.job_store import run_sweeper
+from services.video_queue import get_video_queue
 
 # Load environment variables
 load_dotenv()
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shared clients live for the whole app so connections are reused across requests
+    hrflow.init_client()
+    llm.init_client()
+    video.init_client()
+    get_video_queue().start()
+    sweeper = asyncio.create_task(run_sweeper())
+    replica_sync = asyncio.create_task(hrflow.run_replica_sync())
+    yield
+    replica_sync.cancel()
+    sweeper.cancel()
+    await get_video_queue().stop()
+    await video.close_client()
+    await llm.close_client()
+    hrflow.close_client()
+
+
 app = FastAPI(
     title="Anti-Ghosting HR Agent API",
     description="Personalized rejection emails with skill gap analysis and career feedback",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration for frontend
@@ -23,11 +48,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Chat-Session-Id"],
 )
 
 # Include routers
 app.include_router(analysis.router)
 app.include_router(chat.router)
+app.include_router(webhooks.router)
 
 
 @app.get("/")
@@ -42,3 +69,8 @@ async def root():
 @app.get("/health")
 async def health():
     return {"status": "healthy"}
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return metrics.snapshot()
@@ -31,6 +31,7 @@ class CandidateInfo(BaseModel):
 class ChatContext(BaseModel):
     candidateName: str
     jobTitle: str
+    jobKey: Optional[str] = None  # lets the chat reuse the job's compiled requirements
     skillGaps: list[SkillItem]
     strengths: list[SkillItem]
     recommendations: list[Recommendation]
@@ -1,123 +1,116 @@
 # backend/routers/analysis.py
-from fastapi import APIRouter, BackgroundTasks
-from fastapi.responses import JSONResponse
+import json
+import uuid
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
-from models.schemas import AnalysisResult, SkillItem, CandidateInfo, ChatContext, Recommendation, CourseItem
-from services.hrflow import get_available_jobs, get_available_profiles, analyze_candidate
-from services.email import generate_rejection_email
-from services.video import generate_avatar_video
+from typing import Literal, Optional
+from models.schemas import AnalysisResult
+from services.hrflow import get_available_jobs, get_available_profiles, get_job, list_profile_keys, prepare_analysis
+from services.pipeline import analyze_many, finish_analysis, stream_analysis
+from services.job_store import get_job_store
+from services.video_queue import QueueFull, get_video_queue
 
 router = APIRouter(prefix="/api")
 
-# Simple in-memory store for video generation status (use Redis in production)
-video_jobs: dict[str, dict] = {}
+
+def _listing_response(request: Request, name: str, listing: dict, etag: str) -> Response:
+    """JSON page of a listing, or an empty 304 when the client already has it."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    content = {name: listing["items"], **{k: v for k, v in listing.items() if k != "items"}}
+    return JSONResponse(content=content, headers=headers)
 
 
 @router.get("/jobs")
-async def list_jobs():
-    """Return available jobs from HRFlow board."""
-    return {"jobs": get_available_jobs()}
+async def list_jobs(request: Request, page: int = Query(1, ge=1), limit: int = Query(20, ge=1, le=100)):
+    """Return one page of available jobs from HRFlow board."""
+    listing, etag = await get_available_jobs(page, limit)
+    return _listing_response(request, "jobs", listing, etag)
 
 
 @router.get("/profiles")
-async def list_profiles():
-    """Return available profiles from HRFlow source."""
-    return {"profiles": get_available_profiles()}
+async def list_profiles(request: Request, page: int = Query(1, ge=1), limit: int = Query(20, ge=1, le=100)):
+    """Return one page of available profiles from HRFlow source."""
+    listing, etag = await get_available_profiles(page, limit)
+    return _listing_response(request, "profiles", listing, etag)
 
 
 class AnalyzeRequest(BaseModel):
     profile_key: str
     job_key: str
     roast_mode: bool = False
+    deterministic: bool = False  # temperature-0, cached email (e.g. for re-runs)
 
 
 @router.post("/analyze", response_model=AnalysisResult)
 async def analyze(request: AnalyzeRequest):
     """Analyze existing profile against job."""
 
-    # 1. Get analysis from HRFlow
-    analysis = await analyze_candidate(request.profile_key, request.job_key)
-
-    # 2. Generate rejection email (or roast email)
-    email = await generate_rejection_email(
-        candidate=analysis["profile"],
-        job=analysis["job"],
-        gaps=analysis["skill_gaps"],
-        strengths=analysis["strengths"],
-        language=analysis["detected_language"],
-        roast_mode=request.roast_mode
+    # 1. Get profile, job, score and skill gaps from HRFlow
+    analysis = await prepare_analysis(request.profile_key, request.job_key)
+    # 2. Recommendations + email, then the response
+    return await finish_analysis(analysis, roast_mode=request.roast_mode, deterministic=request.deterministic)
+
+
+@router.post("/analyze/stream")
+async def analyze_stream(request: AnalyzeRequest):
+    """
+    Same analysis as /analyze, streamed as NDJSON events: the score and skill
+    analysis first, then email text chunks and recommendations as they arrive,
+    then the full result. See pipeline.stream_analysis for the event types.
+    """
+    # HRFlow failures happen before the stream starts, so they stay plain 4xx/5xx
+    analysis = await prepare_analysis(request.profile_key, request.job_key)
+    return StreamingResponse(
+        stream_analysis(analysis, roast_mode=request.roast_mode, deterministic=request.deterministic),
+        media_type="application/x-ndjson"
     )
 
-    # 3. Build response
-    candidate_name = f"{analysis['profile'].get('first_name', '')} {analysis['profile'].get('last_name', '')}".strip()
 
-    skill_gaps = [
-        SkillItem(
-            name=gap["name"],
-            candidateLevel=gap["candidateLevel"],
-            requiredLevel=gap["requiredLevel"]
-        )
-        for gap in analysis["skill_gaps"]
-    ]
-
-    strengths = [
-        SkillItem(
-            name=s["name"],
-            candidateLevel=s["candidateLevel"],
-            requiredLevel=s["requiredLevel"]
-        )
-        for s in analysis["strengths"]
-    ]
-
-    # Convert recommendations to Recommendation objects
-    recommendations = [
-        Recommendation(
-            type=rec.get("type", "hardskill"),
-            skill=rec.get("skill"),
-            title=rec.get("title", ""),
-            description=rec.get("description", ""),
-            courses=[
-                CourseItem(
-                    name=c.get("name", ""),
-                    platform=c.get("platform", ""),
-                    url=c.get("url", "")
-                )
-                for c in rec.get("courses", [])
-            ]
-        )
-        for rec in analysis["recommendations"]
-    ]
-
-    chat_context = ChatContext(
-        candidateName=analysis["profile"].get("first_name") or candidate_name or "Candidate",
-        jobTitle=analysis["job"]["title"],
-        skillGaps=skill_gaps,
-        strengths=strengths,
-        recommendations=recommendations
-    )
-
-    return AnalysisResult(
-        score=analysis["score"],
-        threshold=0.8,
-        matched=analysis["score"] >= 0.8,
-        detectedLanguage=analysis["detected_language"],
-        candidate=CandidateInfo(
-            name=candidate_name or "Candidate",
-            email=analysis["profile"].get("email")
-        ),
-        skillGaps=skill_gaps,
-        strengths=strengths,
-        recommendations=recommendations,
-        email=email,
-        videoUrl=None,
-        chatContext=chat_context
-    )
+class BatchAnalyzeRequest(BaseModel):
+    job_key: str
+    profile_keys: Optional[list[str]] = None  # None = every profile in the HRFlow source
+    roast_mode: bool = False
+    deterministic: bool = False
+
+
+@router.post("/analyze/batch")
+async def analyze_batch(request: BatchAnalyzeRequest):
+    """
+    Analyze many candidates for one job, streamed back as NDJSON.
+    One line per candidate, in completion order:
+    {"profile_key": ..., "status": "ok", "result": AnalysisResult}
+    or {"profile_key": ..., "status": "error", "error": ...}
+    """
+    # Resolve the job and candidate list up front so bad input is a plain 4xx
+    if request.profile_keys == []:
+        # An empty list is a mistake, not "everyone": omit profile_keys for the whole source
+        raise HTTPException(status_code=422, detail="profile_keys is empty")
+    job_data = await get_job(request.job_key)
+    profile_keys = request.profile_keys if request.profile_keys is not None else await list_profile_keys()
+
+    async def stream():
+        async for item in analyze_many(
+            job_data,
+            request.job_key,
+            profile_keys,
+            roast_mode=request.roast_mode,
+            deterministic=request.deterministic
+        ):
+            yield json.dumps(jsonable_encoder(item)) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 class VideoRequest(BaseModel):
     email_content: str
     language: str = "en"
+    priority: Literal["interactive", "bulk"] = "interactive"  # bulk campaigns yield to the UI
 
 
 class VideoResponse(BaseModel):
@@ -126,47 +119,19 @@ class VideoResponse(BaseModel):
     video_url: Optional[str] = None
 
 
-import uuid
-import asyncio
-
-
-async def _generate_video_task(job_id: str, email_content: str, language: str):
-    """Background task to generate video."""
-    video_jobs[job_id]["status"] = "processing"
-
-    try:
-        video_url, error = await generate_avatar_video(email_content, language)
-
-        if video_url:
-            video_jobs[job_id]["status"] = "completed"
-            video_jobs[job_id]["video_url"] = video_url
-        else:
-            video_jobs[job_id]["status"] = "failed"
-            video_jobs[job_id]["error"] = error or "Video generation failed"
-
-    except Exception as e:
-        video_jobs[job_id]["status"] = "failed"
-        video_jobs[job_id]["error"] = str(e)
-
-
 @router.post("/generate-video")
-async def generate_video(request: VideoRequest, background_tasks: BackgroundTasks):
-    """Start video generation in the background."""
+async def generate_video(request: VideoRequest):
+    """Queue video generation; 429 with Retry-After when the queue is full."""
     job_id = str(uuid.uuid4())
 
-    video_jobs[job_id] = {
-        "status": "pending",
-        "video_url": None,
-        "error": None
-    }
-
-    # Start video generation in background
-    background_tasks.add_task(
-        _generate_video_task,
-        job_id,
-        request.email_content,
-        request.language
-    )
+    try:
+        await get_video_queue().submit(job_id, request.email_content, request.language, request.priority)
+    except QueueFull as e:
+        return JSONResponse(
+            status_code=429,
+            content={"error": str(e)},
+            headers={"Retry-After": str(e.retry_after)}
+        )
 
     return {"job_id": job_id, "status": "pending"}
 
@@ -174,13 +139,13 @@ async def generate_video(request: VideoRequest, background_tasks: BackgroundTask
 @router.get("/video-status/{job_id}")
 async def get_video_status(job_id: str):
     """Check video generation status."""
-    if job_id not in video_jobs:
+    job = await get_job_store().get(job_id)
+    if job is None:
         return JSONResponse(
             status_code=404,
             content={"error": "Job not found"}
         )
 
-    job = video_jobs[job_id]
     return {
         "job_id": job_id,
         "status": job["status"],
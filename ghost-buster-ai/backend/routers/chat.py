@@ -1,48 +1,96 @@
 # backend/routers/chat.py
-import os
-import json
+from typing import Optional
 from fastapi import APIRouter, Request
-from fastapi.responses import StreamingResponse
-import anthropic
+from fastapi.responses import JSONResponse, StreamingResponse
+from services import metrics
+from services.chat_sessions import get_chat_sessions, history_budget
+from services.hrflow import fetch_compiled_job
+from services.llm import get_client
+from services.streaming import coalesce_text_stream
+from services.skill_index import canonical_skill
 
 router = APIRouter(prefix="/api")
 
 
-def _get_client():
-    return anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-
-
 @router.post("/chat")
 async def chat(request: Request):
     """
     Streaming chat endpoint for career feedback conversations.
     Compatible with Vercel AI SDK.
+
+    The first turn sends `messages` and `context` and gets a session id back in
+    the X-Chat-Session-Id header. Later turns send that `session_id` with only
+    the new messages; an unknown or expired session answers 404 and the client
+    starts over with the full history.
     """
     body = await request.json()
-    messages = body.get("messages", [])
     context = body.get("context", {})
 
-    # Build system prompt with candidate context
-    system_prompt = build_system_prompt(context)
-
     # Convert messages to Anthropic format
-    anthropic_messages = []
-    for msg in messages:
+    messages = []
+    for msg in body.get("messages", []):
         role = "user" if msg["role"] == "user" else "assistant"
-        anthropic_messages.append({"role": role, "content": msg["content"]})
+        messages.append({"role": role, "content": msg["content"]})
+
+    sessions = get_chat_sessions()
+    if body.get("session_id"):
+        session = sessions.get(body["session_id"])
+        if session is None:
+            metrics.incr("chat.session_misses")
+            return JSONResponse(status_code=404, content={"error": "Chat session expired"})
+        metrics.incr("chat.session_hits")
+        session.history.extend(messages)
+    else:
+        # Job requirements come from the compiled job when the context names one
+        job_prompt = None
+        if context.get("jobKey"):
+            try:
+                job_prompt = (await fetch_compiled_job(context["jobKey"])).prompt
+            except Exception as e:
+                print(f"Chat could not load job {context['jobKey']}: {e}")
+
+        # Build system prompt with candidate context, once per session
+        session = sessions.create(build_system_prompt(context, job_prompt), messages)
+
+    budget = history_budget()
+    params = session.request(budget)
 
     async def generate():
         """Stream response in Vercel AI SDK format."""
-        client = _get_client()
-        with client.messages.stream(
-            model="claude-sonnet-4-20250514",
-            max_tokens=1024,
-            system=system_prompt,
-            messages=anthropic_messages,
-        ) as stream:
-            for text in stream.text_stream:
-                # Vercel AI SDK expects this format for streaming
-                yield f"0:{json.dumps(text)}\n"
+        client = get_client()
+        reply = []
+        try:
+            async with client.messages.stream(
+                model="claude-sonnet-4-20250514",
+                max_tokens=1024,
+                **params
+            ) as stream:
+                async def deltas():
+                    async for text in stream.text_stream:
+                        # Leaving the `async with` closes the upstream stream, so a
+                        # client that hung up stops costing us tokens
+                        if await request.is_disconnected():
+                            print("Chat client disconnected, cancelling upstream stream")
+                            return
+                        reply.append(text)
+                        yield text
+
+                # Vercel AI SDK `0:` text parts, coalesced into fewer writes
+                async for chunk in coalesce_text_stream(deltas(), "chat"):
+                    yield chunk
+                if await request.is_disconnected():
+                    return
+
+                usage = (await stream.get_final_message()).usage
+                metrics.incr("chat.input_tokens", usage.input_tokens)
+                # Both stay 0 until a chat is long enough to cache (see ChatSession.request)
+                metrics.incr("chat.cache_read_tokens", usage.cache_read_input_tokens or 0)
+                metrics.incr("chat.cache_write_tokens", usage.cache_creation_input_tokens or 0)
+        finally:
+            # Whatever the client saw becomes part of the conversation
+            if reply:
+                session.history.append({"role": "assistant", "content": "".join(reply)})
+                session.compact_later(budget)
 
         # Send finish message
         yield 'd:{"finishReason":"stop"}\n'
@@ -52,17 +100,18 @@ async def chat(request: Request):
         media_type="text/plain; charset=utf-8",
         headers={
             "X-Vercel-AI-Data-Stream": "v1",
+            "X-Chat-Session-Id": session.id,
         }
     )
 
 
-def build_system_prompt(context: dict) -> str:
+def build_system_prompt(context: dict, job_prompt: Optional[str] = None) -> str:
     """Build a personalized system prompt based on candidate context."""
 
     candidate_name = context.get("candidateName", "the candidate")
     job_title = context.get("jobTitle", "the position")
-    skill_gaps = context.get("skillGaps", [])
-    strengths = context.get("strengths", [])
+    skill_gaps = _unique_skills(context.get("skillGaps", []))
+    strengths = _unique_skills(context.get("strengths", []))
     recommendations = context.get("recommendations", [])
 
     gaps_text = "\n".join([
@@ -86,6 +135,8 @@ Your role is to:
 4. Answer questions about the role and requirements
 5. Collect any feedback they have about the application process
 
+{job_prompt or f"JOB: {job_title}"}
+
 CANDIDATE CONTEXT:
 Name: {candidate_name}
 Applied for: {job_title}
@@ -109,3 +160,15 @@ GUIDELINES:
 - Match the language of the user (if they write in French, respond in French)
 
 Remember: The goal is to help candidates improve, not to make them feel bad about not getting the job."""
+
+
+def _unique_skills(skills: list[dict]) -> list[dict]:
+    """Drop entries naming a skill already listed ("Python 3" after "Python")."""
+    seen = set()
+    unique = []
+    for skill in skills:
+        key = canonical_skill(skill.get("name", ""))
+        if key not in seen:
+            seen.add(key)
+            unique.append(skill)
+    return unique
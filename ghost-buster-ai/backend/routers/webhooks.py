@@ -0,0 +1,37 @@
+# backend/routers/webhooks.py
+import json
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse
+from services.job_store import get_job_store
+from services.video import handle_webhook_event, verify_webhook_signature
+
+router = APIRouter(prefix="/api/webhooks")
+
+
+@router.post("/heygen")
+async def heygen_webhook(request: Request):
+    """
+    HeyGen render callbacks (avatar_video.success / avatar_video.fail).
+    Updates the shared video job store directly, so the status is visible from
+    any worker as soon as HeyGen calls us.
+    """
+    body = await request.body()
+    if not verify_webhook_signature(body, request.headers.get("signature")):
+        return JSONResponse(status_code=401, content={"error": "Invalid signature"})
+
+    try:
+        event = json.loads(body)
+    except ValueError:
+        return JSONResponse(status_code=400, content={"error": "Invalid JSON"})
+
+    update = handle_webhook_event(event)
+    if update:
+        fields = {"status": update["status"], "video_url": update["video_url"], "error": update["error"]}
+        store = get_job_store()
+        # Every job sharing this render, plus the callback_id (the job that started it)
+        # in case the webhook beats the video_id being recorded
+        await store.update_by_video(update["video_id"], **fields)
+        if update["callback_id"]:
+            await store.update(update["callback_id"], **fields)
+
+    return {"received": True}
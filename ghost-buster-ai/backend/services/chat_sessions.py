@@ -0,0 +1,157 @@
+# backend/services/chat_sessions.py
+"""
+Server-side chat sessions for /api/chat.
+A session keeps the built system prompt and the conversation, so a turn only
+sends the new message. History is kept under a token budget: the request
+carries the newest turns that fit, and turns that fall out of the window are
+folded into a running summary in the background.
+"""
+import os
+import time
+import uuid
+import asyncio
+from collections import OrderedDict
+from typing import Optional
+
+from services import metrics
+from services.llm import complete
+
+
+# Shortest prefix Sonnet 4 will cache; shorter breakpoints are accepted but ignored
+CACHE_MIN_TOKENS = 1024
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting
+    return len(text) // 4 + 1
+
+
+class ChatSession:
+    def __init__(self, system_prompt: str, history: list[dict]):
+        self.id = uuid.uuid4().hex
+        self.system_prompt = system_prompt
+        self.history = history
+        self.summary = ""
+        self.updated_at = time.time()
+        self._compacting: Optional[asyncio.Task] = None
+
+    def window(self, budget: int) -> tuple[list[dict], list[dict]]:
+        """
+        Split history into (older turns beyond the budget, newest turns that fit).
+        Older turns are only returned once the budget is exceeded: leading
+        assistant turns (the UI's greeting) are left out of the request but are
+        not worth a summary on their own.
+        """
+        used = 0
+        start = len(self.history)
+        while start > 0:
+            cost = estimate_tokens(self.history[start - 1]["content"])
+            # The latest message always goes out, even when it alone is over budget
+            if used + cost > budget and start < len(self.history):
+                break
+            used += cost
+            start -= 1
+        over_budget = start > 0
+        # Conversations sent to the model must open with a user turn
+        while start < len(self.history) - 1 and self.history[start]["role"] != "user":
+            start += 1
+        return (self.history[:start] if over_budget else []), self.history[start:]
+
+    def request(self, budget: int) -> dict:
+        """
+        `system` and `messages` for the Messages API, with a prompt-cache breakpoint.
+        A breakpoint only caches once the prefix up to it reaches CACHE_MIN_TOKENS.
+        The built system prompt alone is well under that, so the breakpoint sits on
+        the conversation: system prompt and history get cached together once the
+        chat is long enough, and short chats are simply not cached.
+        """
+        system = [{"type": "text", "text": self.system_prompt}]
+        if self.summary:
+            system.append({"type": "text", "text": f"Summary of the earlier conversation:\n{self.summary}"})
+
+        _, recent = self.window(budget)
+        messages = [{"role": m["role"], "content": m["content"]} for m in recent]
+        # Cache everything before the new message, so each turn only pays for that
+        prefix = estimate_tokens(self.system_prompt) + estimate_tokens(self.summary)
+        prefix += sum(estimate_tokens(m["content"]) for m in messages[:-1])
+        if len(messages) > 1 and prefix >= CACHE_MIN_TOKENS:
+            previous = messages[-2]
+            previous["content"] = [{"type": "text", "text": previous["content"], "cache_control": {"type": "ephemeral"}}]
+        return {"system": system, "messages": messages}
+
+    def compact_later(self, budget: int) -> None:
+        """Fold turns that no longer fit the budget into the summary, off the request path."""
+        older, _ = self.window(budget)
+        if older and (self._compacting is None or self._compacting.done()):
+            self._compacting = asyncio.create_task(self._compact(len(older)))
+
+    async def _compact(self, count: int) -> None:
+        older = self.history[:count]
+        transcript = "\n".join(f"{m['role'].upper()}: {m['content']}" for m in older)
+        try:
+            self.summary = await complete(
+                "chat_summary",
+                model="claude-sonnet-4-20250514",
+                max_tokens=400,
+                messages=[{"role": "user", "content": f"""Summarize this career-coaching conversation for the coach's notes.
+Keep every fact the candidate shared, questions still open and advice already given. Max 150 words.
+
+PREVIOUS SUMMARY:
+{self.summary or "None"}
+
+CONVERSATION:
+{transcript}"""}]
+            )
+        except Exception as e:
+            # The window still truncates history, so a failed summary only loses context
+            print(f"Chat summary failed for session {self.id}: {e}")
+            return
+        del self.history[:count]
+        metrics.incr("chat.summaries")
+
+
+class ChatSessionStore:
+    """In-process LRU of sessions with an idle TTL."""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._sessions: OrderedDict[str, ChatSession] = OrderedDict()
+
+    def create(self, system_prompt: str, history: list[dict]) -> ChatSession:
+        session = ChatSession(system_prompt, history)
+        self._sessions[session.id] = session
+        while len(self._sessions) > self.max_entries:
+            self._sessions.popitem(last=False)
+        metrics.gauge("chat.sessions", len(self._sessions))
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if session.updated_at + self.ttl < time.time():
+            del self._sessions[session_id]
+            metrics.gauge("chat.sessions", len(self._sessions))
+            return None
+        session.updated_at = time.time()
+        self._sessions.move_to_end(session_id)
+        return session
+
+
+_store: Optional[ChatSessionStore] = None
+
+
+def get_chat_sessions() -> ChatSessionStore:
+    global _store
+
+    if _store is None:
+        _store = ChatSessionStore(
+            max_entries=int(os.getenv("CHAT_SESSION_MAX_ENTRIES", "5000")),
+            ttl=float(os.getenv("CHAT_SESSION_TTL", "3600"))
+        )
+    return _store
+
+
+def history_budget() -> int:
+    return int(os.getenv("CHAT_HISTORY_TOKEN_BUDGET", "3000"))
@@ -1,23 +1,43 @@
 # backend/services/email.py
-import os
-import anthropic
+from typing import AsyncIterator
 
+from services.llm import complete, stream_text
 
-def _get_client():
-    return anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
+async def generate_rejection_email(candidate, job, gaps, strengths, language, roast_mode=False, deterministic=False):
+    """
+    Write the rejection (or roast) email.
+    With `deterministic`, the email is sampled at temperature 0 and served from the
+    LLM response cache, so re-running the same analysis costs no extra call.
+    """
+    return await complete(
+        "email",
+        cache=deterministic,
+        **_email_request(candidate, job, gaps, strengths, language, roast_mode, deterministic)
+    )
+
+
+def stream_rejection_email(candidate, job, gaps, strengths, language, roast_mode=False, deterministic=False) -> AsyncIterator[str]:
+    """Same email as generate_rejection_email, yielded as text deltas while it is written."""
+    return stream_text(
+        "email",
+        cache=deterministic,
+        **_email_request(candidate, job, gaps, strengths, language, roast_mode, deterministic)
+    )
 
-async def generate_rejection_email(candidate, job, gaps, strengths, language, roast_mode=False):
-    client = _get_client()
 
+def _email_request(candidate, job, gaps, strengths, language, roast_mode, deterministic) -> dict:
+    """Messages API parameters for the email prompt."""
     candidate_name = f"{candidate.get('first_name') or ''} {candidate.get('last_name') or ''}".strip() or "Candidate"
+    # The job block comes from the compiled job and is identical for all its candidates
+    job_prompt = job.get("prompt") or f"JOB: {job['title']}"
 
     if roast_mode:
         prompt = f"""Generate a brutally honest, savage roast email about why this candidate didn't get the job.
 Be funny but not mean-spirited - think comedy roast, not bullying. Use humor and wit.
 
+{job_prompt}
 CANDIDATE: {candidate_name}
-JOB: {job['title']}
 LANGUAGE: Write in {language}
 
 THEIR SO-CALLED "STRENGTHS":
@@ -38,8 +58,8 @@ Requirements:
     else:
         prompt = f"""Generate a warm, constructive rejection email.
 
+{job_prompt}
 CANDIDATE: {candidate_name}
-JOB: {job['title']}
 LANGUAGE: Write in {language}
 
 STRENGTHS TO PRAISE:
@@ -57,10 +77,11 @@ Requirements:
 - Include a line inviting them to chat for feedback and career advice
 """
 
-    response = client.messages.create(
+    params = {"temperature": 0} if deterministic else {}
+
+    return dict(
         model="claude-sonnet-4-20250514",
         max_tokens=500,
-        messages=[{"role": "user", "content": prompt}]
+        messages=[{"role": "user", "content": prompt}],
+        **params
     )
-
-    return response.content[0].text
@@ -3,29 +3,177 @@
 HRFlow.ai integration - uses existing profiles, no parsing.
 """
 import os
+import time
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional, Union
+
+import requests
 from fastapi import HTTPException
+from hrflow import Hrflow
+from requests.adapters import HTTPAdapter
+from models.schemas import Recommendation
+from services import metrics
+from services.llm import complete_structured
+from services.replica import get_replica
+from services.job_artifacts import CompiledJob, compile_job
+from services.swr_cache import SWRCache
+
+
+class _PooledHrflow(Hrflow):
+    """Hrflow client that sends every request through one keep-alive session.
+
+    The SDK calls module-level `requests.get/post`, which opens a new
+    connection (and TLS handshake) per call. Routing the SDK's transport
+    methods through a pooled `requests.Session` lets calls reuse connections.
+    """
+
+    def __init__(self, session: requests.Session, timeout: tuple[float, float], **kwargs):
+        super().__init__(**kwargs)
+        self.session = session
+        self.timeout = timeout
+
+    def get(self, resource_endpoint, query_params={}):
+        url = self._create_request_url(resource_endpoint)
+        params = self._validate_args(query_params) if query_params else None
+        return self.session.get(url, headers=self.auth_header, params=params, timeout=self.timeout)
+
+    def post(self, resource_endpoint, data={}, json={}, files=None):
+        url = self._create_request_url(resource_endpoint)
+        if files:
+            data = self._validate_args(data)
+            return self.session.post(url, headers=self.auth_header, files=files, data=data, timeout=self.timeout)
+        return self.session.post(url, headers=self.auth_header, data=data, json=json, timeout=self.timeout)
+
+    def patch(self, resource_endpoint, json={}):
+        url = self._create_request_url(resource_endpoint)
+        data = self._validate_args(json)
+        return self.session.patch(url, headers=self.auth_header, json=data, timeout=self.timeout)
+
+    def put(self, resource_endpoint, json={}):
+        url = self._create_request_url(resource_endpoint)
+        return self.session.put(url, headers=self.auth_header, json=json, timeout=self.timeout)
+
+
+# App-lifetime client, created by init_client() from the FastAPI lifespan hook
+_client: Optional[_PooledHrflow] = None
+# Bounded worker pool the blocking SDK calls run on, sized to the connection pool
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def init_client() -> _PooledHrflow:
+    """Create the shared HRFlow client with a keep-alive connection pool."""
+    global _client, _executor
+
+    if _client is not None:
+        return _client
+
+    pool_size = int(os.getenv("HRFLOW_POOL_SIZE", "10"))
+    connect_timeout = float(os.getenv("HRFLOW_CONNECT_TIMEOUT", "5"))
+    read_timeout = float(os.getenv("HRFLOW_READ_TIMEOUT", "30"))
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+    max_workers = int(os.getenv("HRFLOW_MAX_WORKERS", str(pool_size)))
+    _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hrflow")
+
+    _client = _PooledHrflow(
+        session=session,
+        timeout=(connect_timeout, read_timeout),
+        api_secret=os.getenv("HRFLOW_API_KEY"),
+        api_user=os.getenv("HRFLOW_USER_EMAIL")
+    )
+    return _client
+
+
+def close_client() -> None:
+    """Close the shared HRFlow client and its pooled connections."""
+    global _client, _executor
+
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
+    if _client is not None:
+        _client.session.close()
+        _client = None
+
+
+def _get_client() -> _PooledHrflow:
+    # Lazily initialise when used outside the app lifespan (scripts, REPL)
+    return _client or init_client()
+
+
+async def _run(fn, *args, **kwargs):
+    """Run a blocking SDK call on the HRFlow worker pool, off the event loop."""
+    _get_client()
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(fn, *args, **kwargs))
+
+
+# Job/profile listings behind a stale-while-revalidate cache, keyed by (kind, container, page, limit)
+_listings: Optional[SWRCache] = None
+
+
+def _get_listings() -> SWRCache:
+    global _listings
+
+    if _listings is None:
+        _listings = SWRCache(
+            "hrflow.listings",
+            ttl=float(os.getenv("HRFLOW_LISTING_TTL", "60")),
+            stale_ttl=float(os.getenv("HRFLOW_LISTING_STALE_TTL", "600")),
+            max_entries=int(os.getenv("HRFLOW_LISTING_CACHE_SIZE", "200"))
+        )
+    return _listings
+
+
+def _listing_page(response: dict, items: list[dict], page: int, limit: int) -> dict:
+    meta = response.get("meta", {})
+    max_page = meta.get("maxPage") or 1
+    return {
+        "items": items,
+        "page": page,
+        "limit": limit,
+        "max_page": max_page,
+        "total": meta.get("total", len(items)),
+        "next_page": page + 1 if page < max_page else None,
+    }
 
 
-def get_available_jobs() -> list[dict]:
-    """Fetch jobs from HRFlow board."""
-    from hrflow import Hrflow
+async def _fetch_all_pages(fetch_page: Callable[[int], Awaitable[dict]]) -> list[dict]:
+    """Every page of a paginated listing, in order."""
+    # First page tells us how many there are; fetch the rest in parallel
+    first = await fetch_page(1)
+    max_page = first.get("meta", {}).get("maxPage") or 1
+    rest = await asyncio.gather(*[fetch_page(page) for page in range(2, max_page + 1)])
+    return [first, *rest]
 
+
+async def get_available_jobs(page: int = 1, limit: int = 20) -> tuple[dict, str]:
+    """One page of jobs from the HRFlow board, with its ETag."""
     board_key = os.getenv("HRFLOW_BOARD_KEY")
-    client = Hrflow(
-        api_secret=os.getenv("HRFLOW_API_KEY"),
-        api_user=os.getenv("HRFLOW_USER_EMAIL")
-    )
+    return await _get_listings().get(("jobs", board_key, page, limit), lambda: _fetch_jobs(board_key, page, limit))
+
+
+async def _fetch_jobs(board_key: str, page: int, limit: int) -> dict:
+    client = _get_client()
 
-    response = client.job.storing.list(
+    response = await _run(
+        client.job.storing.list,
         board_keys=[board_key],
-        limit=20
+        page=page,
+        limit=limit
     )
 
     if response.get("code") != 200:
         raise HTTPException(status_code=500, detail=f"Failed to fetch jobs: {response.get('message')}")
 
     jobs = response.get("data", [])
-    return [
+    items = [
         {
             "key": job.get("key"),
             "title": job.get("name", "Untitled"),
@@ -34,21 +182,23 @@ def get_available_jobs() -> list[dict]:
         }
         for job in jobs
     ]
+    return _listing_page(response, items, page, limit)
 
 
-def get_available_profiles() -> list[dict]:
-    """Fetch existing profiles from HRFlow source."""
-    from hrflow import Hrflow
-
+async def get_available_profiles(page: int = 1, limit: int = 20) -> tuple[dict, str]:
+    """One page of existing profiles from the HRFlow source, with its ETag."""
     source_key = os.getenv("HRFLOW_SOURCE_KEY")
-    client = Hrflow(
-        api_secret=os.getenv("HRFLOW_API_KEY"),
-        api_user=os.getenv("HRFLOW_USER_EMAIL")
-    )
+    return await _get_listings().get(("profiles", source_key, page, limit), lambda: _fetch_profiles(source_key, page, limit))
+
+
+async def _fetch_profiles(source_key: str, page: int, limit: int) -> dict:
+    client = _get_client()
 
-    response = client.profile.storing.list(
+    response = await _run(
+        client.profile.storing.list,
         source_keys=[source_key],
-        limit=20,
+        page=page,
+        limit=limit,
         return_profile=True
     )
 
@@ -74,20 +224,43 @@ def get_available_profiles() -> list[dict]:
             "name": full_name,
             "email": info.get("email") or "",
         })
-    return result
+    return _listing_page(response, result, page, limit)
 
 
-async def get_profile(profile_key: str) -> dict:
-    """Get a specific profile by key."""
-    from hrflow import Hrflow
-
+async def list_profile_keys() -> list[str]:
+    """Return the key of every profile in the HRFlow source (all pages)."""
     source_key = os.getenv("HRFLOW_SOURCE_KEY")
-    client = Hrflow(
-        api_secret=os.getenv("HRFLOW_API_KEY"),
-        api_user=os.getenv("HRFLOW_USER_EMAIL")
-    )
+    client = _get_client()
+
+    async def fetch_page(page: int) -> dict:
+        response = await _run(
+            client.profile.storing.list,
+            source_keys=[source_key],
+            page=page,
+            limit=100
+        )
+        if response.get("code") != 200:
+            raise HTTPException(status_code=500, detail=f"Failed to fetch profiles: {response.get('message')}")
+        return response
+
+    return [p.get("key") for response in await _fetch_all_pages(fetch_page) for p in response.get("data", [])]
 
-    response = client.profile.storing.get(
+
+async def get_profile(profile_key: str) -> dict:
+    """Get a specific profile by key, from the local replica when it has it."""
+    source_key = os.getenv("HRFLOW_SOURCE_KEY")
+    replica = get_replica()
+    if replica is not None:
+        profile = await replica.get("profile", source_key, profile_key)
+        if profile is not None:
+            metrics.incr("hrflow.replica_hits")
+            return profile
+        metrics.incr("hrflow.replica_misses")
+
+    client = _get_client()
+
+    response = await _run(
+        client.profile.storing.get,
         source_key=source_key,
         key=profile_key
     )
@@ -95,20 +268,27 @@ async def get_profile(profile_key: str) -> dict:
     if response.get("code") != 200:
         raise HTTPException(status_code=404, detail=f"Profile not found: {profile_key}")
 
-    return response.get("data", {})
+    profile = response.get("data", {})
+    if replica is not None:
+        await replica.put("profile", source_key, profile_key, profile, _edited_at(profile))
+    return profile
 
 
 async def get_job(job_key: str) -> dict:
-    """Get a specific job by key."""
-    from hrflow import Hrflow
-
+    """Get a specific job by key, from the local replica when it has it."""
     board_key = os.getenv("HRFLOW_BOARD_KEY")
-    client = Hrflow(
-        api_secret=os.getenv("HRFLOW_API_KEY"),
-        api_user=os.getenv("HRFLOW_USER_EMAIL")
-    )
-
-    response = client.job.storing.get(
+    replica = get_replica()
+    if replica is not None:
+        job = await replica.get("job", board_key, job_key)
+        if job is not None:
+            metrics.incr("hrflow.replica_hits")
+            return job
+        metrics.incr("hrflow.replica_misses")
+
+    client = _get_client()
+
+    response = await _run(
+        client.job.storing.get,
         board_key=board_key,
         key=job_key
     )
@@ -116,30 +296,184 @@ async def get_job(job_key: str) -> dict:
     if response.get("code") != 200:
         raise HTTPException(status_code=404, detail=f"Job not found: {job_key}")
 
-    return response.get("data", {})
+    job = response.get("data", {})
+    if replica is not None:
+        await replica.put("job", board_key, job_key, job, _edited_at(job))
+    return job
 
 
-async def analyze_candidate(profile_key: str, job_key: str) -> dict:
-    """Analyze existing profile against job."""
+# Replica syncs sort by, compare and keep their high-water mark in this one field;
+# mixing fields (e.g. date_edition) would let the early stop skip edits
+REPLICA_SYNC_FIELD = "updated_at"
+
+
+def _edited_at(document: dict) -> Optional[str]:
+    return document.get(REPLICA_SYNC_FIELD)
+
+
+async def sync_replica() -> dict[str, int]:
+    """
+    Pull profiles and jobs edited since the last sync into the local replica.
+    Lists are read newest edit first and stop at the previous high-water mark,
+    so a sync after the first one costs a page or two.
+    """
+    replica = get_replica()
+    if replica is None:
+        return {}
+
+    client = _get_client()
+    source_key = os.getenv("HRFLOW_SOURCE_KEY")
+    board_key = os.getenv("HRFLOW_BOARD_KEY")
+
+    profiles, jobs = await asyncio.gather(
+        _sync_documents(replica, "profile", source_key, client.profile.storing.list, source_keys=[source_key], return_profile=True),
+        _sync_documents(replica, "job", board_key, client.job.storing.list, board_keys=[board_key], return_job=True)
+    )
+    metrics.incr("hrflow.replica_synced", profiles + jobs)
+    return {"profiles": profiles, "jobs": jobs}
+
 
-    # Get profile and job
-    profile_data = await get_profile(profile_key)
-    job_data = await get_job(job_key)
+async def _sync_documents(replica, kind: str, container_key: str, list_fn, **params) -> int:
+    page_size = int(os.getenv("HRFLOW_REPLICA_PAGE_SIZE", "100"))
+    high_water = await replica.high_water(kind, container_key)
+    newest = high_water
+    synced = 0
+    page = 1
 
-    # Score
-    score = await _score_profile(profile_key, job_key)
+    while True:
+        response = await _run(list_fn, **params, page=page, limit=page_size, sort_by=REPLICA_SYNC_FIELD, order_by="desc")
+        if response.get("code") != 200:
+            raise HTTPException(status_code=502, detail=f"Failed to sync {kind}s: {response.get('message')}")
+
+        documents = [d for d in response.get("data", []) if d.get("key")]
+        # >= re-reads documents edited in the same instant as the mark rather than risk missing one
+        fresh = [d for d in documents if high_water is None or (_edited_at(d) or "") >= high_water]
+        if fresh:
+            await replica.put_many(kind, container_key, [(d["key"], d, _edited_at(d)) for d in fresh])
+            synced += len(fresh)
+            newest = max([newest or "", *[_edited_at(d) or "" for d in fresh]])
+
+        if len(fresh) < len(documents) or page >= (response.get("meta", {}).get("maxPage") or 1):
+            break
+        page += 1
+
+    # Only move the mark once the whole range is in, so an interrupted sync resumes from the old one
+    if newest:
+        await replica.set_high_water(kind, container_key, newest)
+    return synced
+
+
+async def run_replica_sync() -> None:
+    """Keep the local replica in sync with HRFlow for the app's lifetime."""
+    if get_replica() is None:
+        return
+    interval = float(os.getenv("HRFLOW_REPLICA_SYNC_INTERVAL", "300"))
+
+    while True:
+        try:
+            counts = await sync_replica()
+            if any(counts.values()):
+                print(f"HRFlow replica synced {counts['profiles']} profiles, {counts['jobs']} jobs")
+        except Exception as e:
+            print(f"HRFlow replica sync failed: {e}")
+        await asyncio.sleep(interval)
+
+
+async def _with_timeout(coro, label: str):
+    """Await an HRFlow call, turning a slow upstream into a 504."""
+    timeout = float(os.getenv("HRFLOW_CALL_TIMEOUT", "20"))
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail=f"HRFlow {label} request timed out after {timeout:g}s")
 
-    # Analyze skills
-    skill_analysis = _analyze_skills(profile_data, job_data)
 
-    # Recommendations (AI-powered with course suggestions)
-    job_title = job_data.get("name", "Position")
-    recommendations = await _generate_recommendations(
-        skill_analysis["gaps"],
-        skill_analysis["strengths"],
-        job_title
+async def analyze_candidate(profile_key: str, job_key: str) -> dict:
+    """Analyze existing profile against job, including AI recommendations."""
+    analysis = await prepare_analysis(profile_key, job_key)
+    analysis["recommendations"] = await generate_recommendations(
+        analysis["skill_gaps"],
+        analysis["strengths"],
+        analysis["job"]["title"]
     )
+    return analysis
+
+
+async def prepare_analysis(profile_key: str, job_key: str) -> dict:
+    """
+    First stage of an analysis: HRFlow data, score and skill gaps.
+    Everything downstream (recommendations, email) only needs this result,
+    so callers can run those LLM stages concurrently.
+    """
+
+    # Get profile, job and score concurrently - none depends on the others
+    profile_task = asyncio.ensure_future(_with_timeout(get_profile(profile_key), "profile"))
+    job_task = asyncio.ensure_future(_with_timeout(get_job(job_key), "job"))
+    score_task = asyncio.ensure_future(score_profile(profile_key, job_key))
+
+    # Profile and job are required: fail fast and drop the other calls
+    try:
+        profile_data, job_data = await asyncio.gather(profile_task, job_task)
+    except BaseException:
+        for task in (profile_task, job_task, score_task):
+            task.cancel()
+        raise
+
+    # score_profile never raises: a failed sweep is a neutral score
+    return build_analysis(profile_data, get_compiled_job(job_key, job_data), await score_task)
+
+
+def get_compiled_job(job_key: str, job_data: dict) -> CompiledJob:
+    """Compiled requirements for a job; an updated job also gets its scores re-swept."""
+    compiled, updated = compile_job(job_key, job_data)
+    if updated:
+        invalidate_job_scores(job_key)
+    return compiled
+
+
+async def fetch_compiled_job(job_key: str) -> CompiledJob:
+    return get_compiled_job(job_key, await get_job(job_key))
+
+
+async def prepare_analyses(
+    job: CompiledJob,
+    profile_keys: list[str],
+    scores: dict[str, float]
+) -> list[tuple[str, Union[dict, BaseException]]]:
+    """
+    prepare_analysis for a chunk of one job's candidates: profiles are fetched
+    concurrently and their skills analyzed in a single matrix pass.
+    Returns (profile_key, analysis) in order, with the fetch error in place of
+    the analysis for profiles that couldn't be read.
+    """
+    fetched = await asyncio.gather(*[get_profile(key) for key in profile_keys], return_exceptions=True)
+    found = [(key, profile) for key, profile in zip(profile_keys, fetched) if not isinstance(profile, BaseException)]
+    analyses = iter(build_analyses(
+        [profile for _, profile in found],
+        job,
+        [scores.get(key, 0.5) for key, _ in found]
+    ))
+    return [
+        (key, profile if isinstance(profile, BaseException) else next(analyses))
+        for key, profile in zip(profile_keys, fetched)
+    ]
+
 
+def build_analysis(profile_data: dict, job: CompiledJob, score: float) -> dict:
+    """Shape an HRFlow profile, the compiled job and a score into the analysis dict."""
+    return build_analyses([profile_data], job, [score])[0]
+
+
+def build_analyses(profiles: list[dict], job: CompiledJob, scores: list[float]) -> list[dict]:
+    """build_analysis for many candidates of one job, with one skill-matrix pass."""
+    skill_analyses = job.requirements.analyze(profiles)
+    return [
+        _shape_analysis(profile_data, job, score, skill_analysis)
+        for profile_data, score, skill_analysis in zip(profiles, scores, skill_analyses)
+    ]
+
+
+def _shape_analysis(profile_data: dict, job: CompiledJob, score: float, skill_analysis: dict) -> dict:
     # Extract name - handle None values
     info = profile_data.get("info", {})
     first_name = info.get("first_name") or "Candidate"
@@ -153,88 +487,177 @@ async def analyze_candidate(profile_key: str, job_key: str) -> dict:
             "email": info.get("email"),
         },
         "job": {
-            "key": job_key,
-            "title": job_data.get("name", "Position"),
+            "key": job.key,
+            "title": job.title,
+            "prompt": job.prompt,
         },
         "skill_gaps": skill_analysis["gaps"],
         "strengths": skill_analysis["strengths"],
         "detected_language": profile_data.get("text_language", "en"),
-        "recommendations": recommendations,
     }
 
 
+async def score_profile(profile_key: str, job_key: str) -> float:
+    """
+    Profile's score from the job's scoring sweep, bounded by HRFLOW_CALL_TIMEOUT.
+    Scoring is optional: a failed or slow sweep gives a neutral 0.5.
+    """
+    try:
+        return await _with_timeout(_score_profile(profile_key, job_key), "scoring")
+    except Exception as e:
+        print(f"Scoring failed for profile {profile_key}: {e}")
+        return 0.5
+
+
 async def _score_profile(profile_key: str, job_key: str) -> float:
-    """Score profile against job."""
-    from hrflow import Hrflow
+    """Score profile against job; failures are left to score_profile's fallback."""
+    scores = await get_job_scores(job_key)
+    return scores.get(profile_key, 0.5)
 
-    source_key = os.getenv("HRFLOW_SOURCE_KEY")
-    board_key = os.getenv("HRFLOW_BOARD_KEY")
 
-    client = Hrflow(
-        api_secret=os.getenv("HRFLOW_API_KEY"),
-        api_user=os.getenv("HRFLOW_USER_EMAIL")
-    )
+# (board_key, job_key) -> (expires_at, {profile_key: score}) for the full ranked list
+_job_scores: dict[tuple[str, str], tuple[float, dict[str, float]]] = {}
+_job_score_locks: dict[tuple[str, str], asyncio.Lock] = {}
 
-    try:
-        response = client.profile.scoring.list(
-            source_keys=[source_key],
-            board_key=board_key,
-            job_key=job_key,
-            limit=100
-        )
 
-        if response.get("code") != 200:
-            return 0.5
+async def get_job_scores(job_key: str) -> dict[str, float]:
+    """Return every scored profile of the source for a job, swept once per TTL."""
+    board_key = os.getenv("HRFLOW_BOARD_KEY")
+    cache_key = (board_key, job_key)
 
-        predictions = response.get("data", {}).get("predictions", [])
-        profiles = response.get("data", {}).get("profiles", [])
+    cached = _job_scores.get(cache_key)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
 
-        for i, profile in enumerate(profiles):
-            if profile.get("key") == profile_key and i < len(predictions):
-                pred = predictions[i]
-                if isinstance(pred, list) and len(pred) >= 2:
-                    return round(pred[1], 2)
+    # Concurrent analyses for the same job wait for a single sweep
+    lock = _job_score_locks.setdefault(cache_key, asyncio.Lock())
+    try:
+        async with lock:
+            cached = _job_scores.get(cache_key)
+            if cached and cached[0] > time.monotonic():
+                return cached[1]
 
-        return 0.5
-    except Exception:
-        return 0.5
+            scores = await _fetch_job_scores(board_key, job_key)
+
+            max_entries = int(os.getenv("HRFLOW_SCORING_CACHE_SIZE", "100"))
+            _job_scores.pop(cache_key, None)
+            while len(_job_scores) >= max_entries:
+                _drop_job_scores(next(iter(_job_scores)))
 
+            ttl = float(os.getenv("HRFLOW_SCORING_CACHE_TTL", "300"))
+            _job_scores[cache_key] = (time.monotonic() + ttl, scores)
+            return scores
+    finally:
+        # A failed sweep leaves no entry: don't keep its lock around either
+        if cache_key not in _job_scores:
+            _drop_job_scores(cache_key)
 
-def _analyze_skills(profile_data: dict, job_data: dict) -> dict:
-    """Compare candidate skills vs job requirements."""
-    candidate_skills = {s.get("name", "").lower(): s for s in profile_data.get("skills", [])}
-    job_skills = {s.get("name", "").lower(): s for s in job_data.get("skills", [])}
 
-    gaps = []
-    strengths = []
+def _drop_job_scores(cache_key: tuple[str, str]) -> None:
+    """Forget a job's scores and, unless a sweep holds it, its lock."""
+    _job_scores.pop(cache_key, None)
+    lock = _job_score_locks.get(cache_key)
+    if lock is not None and not lock.locked():
+        del _job_score_locks[cache_key]
 
-    for skill_key, job_skill in job_skills.items():
-        candidate_skill = candidate_skills.get(skill_key)
-        required_level = 70
 
-        if candidate_skill:
-            candidate_level = 65
-            if candidate_level >= required_level:
-                strengths.append({"name": job_skill.get("name"), "candidateLevel": candidate_level, "requiredLevel": required_level})
-            else:
-                gaps.append({"name": job_skill.get("name"), "candidateLevel": candidate_level, "requiredLevel": required_level})
-        else:
-            gaps.append({"name": job_skill.get("name"), "candidateLevel": 0, "requiredLevel": required_level})
+def invalidate_job_scores(job_key: Optional[str] = None) -> None:
+    """Drop cached scores for one job, or for every job when no key is given."""
+    for cache_key in [k for k in _job_scores if job_key is None or k[1] == job_key]:
+        _drop_job_scores(cache_key)
 
-    for skill_key, skill in candidate_skills.items():
-        if skill_key not in job_skills:
-            strengths.append({"name": skill.get("name"), "candidateLevel": 75, "requiredLevel": 0})
 
-    gaps.sort(key=lambda x: x["requiredLevel"] - x["candidateLevel"], reverse=True)
-    strengths.sort(key=lambda x: x["candidateLevel"], reverse=True)
+async def _fetch_job_scores(board_key: str, job_key: str) -> dict[str, float]:
+    """Page through the whole scoring list for a job."""
+    source_key = os.getenv("HRFLOW_SOURCE_KEY")
+    page_size = int(os.getenv("HRFLOW_SCORING_PAGE_SIZE", "100"))
+    client = _get_client()
 
-    return {"gaps": gaps[:5], "strengths": strengths[:5]}
+    async def fetch_page(page: int) -> dict:
+        response = await _run(
+            client.profile.scoring.list,
+            source_keys=[source_key],
+            board_key=board_key,
+            job_key=job_key,
+            page=page,
+            limit=page_size
+        )
+        if response.get("code") != 200:
+            raise HTTPException(status_code=502, detail=f"Failed to score job {job_key}: {response.get('message')}")
+        return response
 
+    scores = {}
+    for response in await _fetch_all_pages(fetch_page):
+        predictions = response.get("data", {}).get("predictions", [])
+        profiles = response.get("data", {}).get("profiles", [])
 
-async def _generate_recommendations(gaps: list[dict], strengths: list[dict], job_title: str) -> list[dict]:
+        for profile, pred in zip(profiles, predictions):
+            if isinstance(pred, list) and len(pred) >= 2:
+                scores[profile.get("key")] = round(pred[1], 2)
+
+    return scores
+
+
+# Output schema for recommendations; the answer is a forced call to this tool
+RECOMMENDATIONS_TOOL = {
+    "name": "submit_recommendations",
+    "description": "Submit the learning recommendations for the candidate.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "recommendations": {
+                "type": "array",
+                "minItems": 1,
+                "maxItems": 4,
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "type": {"type": "string", "enum": ["hardskill", "softskill"]},
+                        "skill": {"type": "string", "description": "The specific skill to develop"},
+                        "title": {"type": "string", "description": "Brief actionable title, max 10 words"},
+                        "description": {"type": "string", "description": "1-2 sentences on what to learn and why"},
+                        "courses": {
+                            "type": "array",
+                            "maxItems": 2,
+                            "items": {
+                                "type": "object",
+                                "properties": {
+                                    "name": {"type": "string"},
+                                    "platform": {"type": "string"},
+                                    "url": {"type": "string"}
+                                },
+                                "required": ["name", "platform", "url"]
+                            }
+                        }
+                    },
+                    "required": ["type", "skill", "title", "description", "courses"]
+                }
+            }
+        },
+        "required": ["recommendations"]
+    }
+}
+
+
+def _validate_recommendations(data: dict) -> list[dict]:
+    """Tool input -> Recommendation dicts; raises ValueError with what to fix."""
+    items = data.get("recommendations") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError("`recommendations` must be a non-empty array")
+    recommendations = []
+    for i, item in enumerate(items):
+        try:
+            recommendation = Recommendation.parse_obj(item)
+        except Exception as e:
+            raise ValueError(f"recommendations[{i}]: {e}") from e
+        if recommendation.type not in ("hardskill", "softskill"):
+            raise ValueError(f"recommendations[{i}].type must be \"hardskill\" or \"softskill\"")
+        recommendations.append(recommendation.dict())
+    return recommendations
+
+
+async def generate_recommendations(gaps: list[dict], strengths: list[dict], job_title: str) -> list[dict]:
     """Generate AI-powered recommendations with course suggestions."""
-    import anthropic
-
     if not gaps:
         return [{
             "type": "general",
@@ -260,33 +683,19 @@ For each recommendation, provide:
 4. A description (1-2 sentences)
 5. 1-2 specific online courses with platform and URL
 
-Respond in this exact JSON format:
-[
-  {{
-    "type": "hardskill" or "softskill",
-    "skill": "skill name",
-    "title": "Short actionable title",
-    "description": "Brief description of what to learn and why",
-    "courses": [
-      {{"name": "Course Name", "platform": "Coursera/Udemy/LinkedIn Learning/etc", "url": "https://..."}}
-    ]
-  }}
-]
-
-Focus on reputable platforms: Coursera, Udemy, LinkedIn Learning, Pluralsight, edX, freeCodeCamp.
-Only return the JSON array, no other text."""
+Focus on reputable platforms: Coursera, Udemy, LinkedIn Learning, Pluralsight, edX, freeCodeCamp."""
 
     try:
-        client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-        response = client.messages.create(
+        # Same gaps/strengths/title give the same prompt, so answers are cached
+        return await complete_structured(
+            "recommendations",
+            tool=RECOMMENDATIONS_TOOL,
+            validate=_validate_recommendations,
+            cache=True,
             model="claude-sonnet-4-20250514",
             max_tokens=1000,
             messages=[{"role": "user", "content": prompt}]
         )
-
-        import json
-        result = json.loads(response.content[0].text)
-        return result
     except Exception as e:
         print(f"Failed to generate AI recommendations: {e}")
         # Fallback to simple recommendations
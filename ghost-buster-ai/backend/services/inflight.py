@@ -0,0 +1,45 @@
+# backend/services/inflight.py
+"""
+In-flight call coalescing: concurrent callers asking for the same key share
+one running task instead of each starting their own.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class Inflight:
+    """Key -> running task; a key is forgotten as soon as its task finishes."""
+
+    def __init__(self):
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    def start(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[Any]],
+        on_done: Optional[Callable[[asyncio.Task], None]] = None
+    ) -> tuple[asyncio.Task, bool]:
+        """
+        Return the task running for `key`, starting `factory()` if there is
+        none, and whether this call started it. `on_done` runs once the task
+        finishes, after the key has been released.
+        """
+        task = self._tasks.get(key)
+        if task is not None:
+            return task, False
+
+        task = asyncio.ensure_future(factory())
+        self._tasks[key] = task
+        task.add_done_callback(lambda t: self._finish(key, t, on_done))
+        return task, True
+
+    def _finish(self, key: Hashable, task: asyncio.Task, on_done) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if on_done:
+            on_done(task)
+
+    @staticmethod
+    async def wait(task: asyncio.Task) -> Any:
+        # Shielded so one caller going away doesn't cancel the work others wait on
+        return await asyncio.shield(task)
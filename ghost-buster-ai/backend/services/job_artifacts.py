@@ -0,0 +1,69 @@
+# backend/services/job_artifacts.py
+"""
+Per-job "compiled requirements": everything derived from a job that every
+analysis for it reuses - title, normalized skills with required levels, the
+encoded requirement vector and the job block shared by email and chat prompts.
+Compiled once per job version and kept in a bounded LRU.
+"""
+import os
+import json
+import hashlib
+from collections import OrderedDict
+
+from services import metrics
+from services.skill_index import canonical_skill
+from services.skill_matrix import JobRequirements
+
+
+class CompiledJob:
+    def __init__(self, job_key: str, job_data: dict, version: str):
+        self.key = job_key
+        self.version = version
+        self.title = job_data.get("name", "Position")
+        self.requirements = JobRequirements(job_data)
+        self.skills = [
+            {"id": canonical_skill(name), "name": name, "requiredLevel": int(level)}
+            for name, level in zip(self.requirements.vocabulary.names, self.requirements.required)
+        ]
+        self.prompt = self._build_prompt()
+
+    def _build_prompt(self) -> str:
+        """Job block placed ahead of candidate details in email and chat prompts."""
+        if self.skills:
+            required = ", ".join(f"{s['name']} ({s['requiredLevel']}%)" for s in self.skills)
+        else:
+            required = "Not specified"
+        return f"JOB: {self.title}\nKEY REQUIREMENTS: {required}"
+
+
+def job_version(job_data: dict) -> str:
+    """HRFlow's edition date when present, else a hash of the fields we compile."""
+    edited_at = job_data.get("date_edition") or job_data.get("updated_at")
+    if edited_at:
+        return str(edited_at)
+    payload = json.dumps([job_data.get("name"), job_data.get("skills")], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+_compiled: OrderedDict[str, CompiledJob] = OrderedDict()
+
+
+def compile_job(job_key: str, job_data: dict) -> tuple[CompiledJob, bool]:
+    """
+    Return the compiled job and whether it replaced an older version of it
+    (callers drop other per-job caches, such as scores, when it did).
+    """
+    version = job_version(job_data)
+    cached = _compiled.get(job_key)
+    if cached is not None and cached.version == version:
+        metrics.incr("job_artifacts.hits")
+        _compiled.move_to_end(job_key)
+        return cached, False
+
+    metrics.incr("job_artifacts.builds")
+    compiled = _compiled[job_key] = CompiledJob(job_key, job_data, version)
+    _compiled.move_to_end(job_key)
+    while len(_compiled) > int(os.getenv("JOB_ARTIFACT_CACHE_SIZE", "256")):
+        _compiled.popitem(last=False)
+    return compiled, cached is not None
+
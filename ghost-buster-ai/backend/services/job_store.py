@@ -0,0 +1,251 @@
+# backend/services/job_store.py
+"""
+Video generation job store.
+"memory" keeps a bounded LRU per worker; "sqlite" (WAL) is shared by every
+uvicorn worker on the host and survives restarts, so /api/video-status works
+whichever worker the load balancer picks.
+"""
+import os
+import math
+import time
+import asyncio
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+FINISHED_STATUSES = ("completed", "failed")
+UNFINISHED_STATUSES = ("pending", "processing")
+STALLED_ERROR = "Video job stalled (server restarted or render lost)"
+
+
+class MemoryJobStore:
+    """In-process LRU of jobs with a status index."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._jobs: OrderedDict[str, dict] = OrderedDict()
+        self._by_status: dict[str, set[str]] = {}
+
+    def _index(self, job_id: str, old_status: Optional[str], new_status: Optional[str]) -> None:
+        if old_status is not None:
+            self._by_status.get(old_status, set()).discard(job_id)
+        if new_status is not None:
+            self._by_status.setdefault(new_status, set()).add(job_id)
+
+    def _remove(self, job_id: str) -> None:
+        job = self._jobs.pop(job_id)
+        self._index(job_id, job["status"], None)
+
+    async def create(self, job_id: str, status: str = "pending") -> dict:
+        now = time.time()
+        job = {"job_id": job_id, "status": status, "video_id": None, "video_url": None, "error": None, "created_at": now, "updated_at": now}
+        self._jobs[job_id] = job
+        self._index(job_id, None, status)
+        # Evict least recently touched jobs beyond the cap
+        while len(self._jobs) > self.max_entries:
+            self._remove(next(iter(self._jobs)))
+        return dict(job)
+
+    async def update(self, job_id: str, **fields) -> None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return
+        if "status" in fields:
+            self._index(job_id, job["status"], fields["status"])
+        job.update(fields, updated_at=time.time())
+        self._jobs.move_to_end(job_id)
+
+    async def update_by_video(self, video_id: str, **fields) -> int:
+        """Update every unfinished job waiting on a HeyGen render."""
+        job_ids = [
+            job_id
+            for status in UNFINISHED_STATUSES
+            for job_id in self._by_status.get(status, ())
+            if self._jobs[job_id]["video_id"] == video_id
+        ]
+        for job_id in job_ids:
+            await self.update(job_id, **fields)
+        return len(job_ids)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def list_by_status(self, status: str, limit: int = 100) -> list[dict]:
+        job_ids = list(self._by_status.get(status, ()))[:limit]
+        return [dict(self._jobs[job_id]) for job_id in job_ids]
+
+    async def sweep(self, max_age: float) -> int:
+        """Drop finished jobs not updated for `max_age` seconds."""
+        cutoff = time.time() - max_age
+        expired = [
+            job_id
+            for status in FINISHED_STATUSES
+            for job_id in self._by_status.get(status, ())
+            if self._jobs[job_id]["updated_at"] < cutoff
+        ]
+        for job_id in expired:
+            self._remove(job_id)
+        return len(expired)
+
+    async def fail_stalled(self, processing_after: float, pending_after: float) -> int:
+        """
+        Mark jobs as failed once they've gone without an update for
+        `processing_after` seconds while processing, or `pending_after` while pending.
+        """
+        now = time.time()
+        cutoffs = {"processing": now - processing_after, "pending": now - pending_after}
+        stalled = [
+            job_id
+            for status, cutoff in cutoffs.items()
+            for job_id in self._by_status.get(status, ())
+            if self._jobs[job_id]["updated_at"] < cutoff
+        ]
+        for job_id in stalled:
+            await self.update(job_id, status="failed", error=STALLED_ERROR)
+        return len(stalled)
+
+
+class SQLiteJobStore:
+    """Jobs in a WAL-mode SQLite file, safe to share between worker processes."""
+
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS video_jobs ("
+            " job_id TEXT PRIMARY KEY, status TEXT NOT NULL,"
+            " video_id TEXT, video_url TEXT, error TEXT,"
+            " created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(video_jobs)")}
+        if "video_id" not in columns:
+            # Stores created before renders were shared between jobs
+            self._conn.execute("ALTER TABLE video_jobs ADD COLUMN video_id TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS video_jobs_status ON video_jobs (status, updated_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS video_jobs_video ON video_jobs (video_id)")
+
+    def _execute(self, sql: str, params: tuple = ()) -> list[dict]:
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    async def create(self, job_id: str, status: str = "pending") -> dict:
+        now = time.time()
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT INTO video_jobs (job_id, status, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (job_id, status, now, now)
+        )
+        return {"job_id": job_id, "status": status, "video_id": None, "video_url": None, "error": None, "created_at": now, "updated_at": now}
+
+    async def update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = time.time()
+        # Column names come from our own callers, never from request input
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        await asyncio.to_thread(
+            self._execute,
+            f"UPDATE video_jobs SET {assignments} WHERE job_id = ?",
+            (*fields.values(), job_id)
+        )
+
+    async def update_by_video(self, video_id: str, **fields) -> int:
+        """Update every unfinished job waiting on a HeyGen render."""
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+
+        def update() -> int:
+            with self._lock:
+                cursor = self._conn.execute(
+                    f"UPDATE video_jobs SET {assignments} WHERE video_id = ? AND status IN (?, ?)",
+                    (*fields.values(), video_id, *UNFINISHED_STATUSES)
+                )
+                return cursor.rowcount
+        return await asyncio.to_thread(update)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        rows = await asyncio.to_thread(self._execute, "SELECT * FROM video_jobs WHERE job_id = ?", (job_id,))
+        return rows[0] if rows else None
+
+    async def list_by_status(self, status: str, limit: int = 100) -> list[dict]:
+        return await asyncio.to_thread(
+            self._execute,
+            "SELECT * FROM video_jobs WHERE status = ? ORDER BY updated_at LIMIT ?",
+            (status, limit)
+        )
+
+    async def sweep(self, max_age: float) -> int:
+        """Drop finished jobs not updated for `max_age` seconds."""
+        def delete() -> int:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "DELETE FROM video_jobs WHERE status IN (?, ?) AND updated_at < ?",
+                    (*FINISHED_STATUSES, time.time() - max_age)
+                )
+                return cursor.rowcount
+        return await asyncio.to_thread(delete)
+
+    async def fail_stalled(self, processing_after: float, pending_after: float) -> int:
+        """
+        Mark jobs as failed once they've gone without an update for
+        `processing_after` seconds while processing, or `pending_after` while pending.
+        """
+        def fail() -> int:
+            now = time.time()
+            with self._lock:
+                cursor = self._conn.execute(
+                    "UPDATE video_jobs SET status = 'failed', error = ?, updated_at = ?"
+                    " WHERE (status = 'processing' AND updated_at < ?)"
+                    " OR (status = 'pending' AND updated_at < ?)",
+                    (STALLED_ERROR, now, now - processing_after, now - pending_after)
+                )
+                return cursor.rowcount
+        return await asyncio.to_thread(fail)
+
+
+_store = None
+
+
+def get_job_store():
+    """Backend selected by VIDEO_JOB_STORE: "memory" (default) or "sqlite"."""
+    global _store
+
+    if _store is None:
+        if os.getenv("VIDEO_JOB_STORE", "memory").lower() == "sqlite":
+            _store = SQLiteJobStore(os.getenv("VIDEO_JOB_STORE_PATH", "video_jobs.sqlite3"))
+        else:
+            _store = MemoryJobStore(int(os.getenv("VIDEO_JOB_MAX_ENTRIES", "10000")))
+    return _store
+
+
+async def run_sweeper() -> None:
+    """
+    Periodically evict finished jobs so the store stays flat over long uptimes.
+    Jobs a crash or shutdown left pending/processing are failed first, so they
+    get evicted too instead of piling up in the SQLite file.
+    """
+    interval = float(os.getenv("VIDEO_JOB_SWEEP_INTERVAL", "300"))
+    max_age = float(os.getenv("VIDEO_JOB_TTL", "86400"))
+    # A render reports back within HEYGEN_RENDER_TIMEOUT; a processing job silent
+    # for longer has lost its worker
+    render_timeout = float(os.getenv("HEYGEN_RENDER_TIMEOUT", "600"))
+    processing_after = float(os.getenv("VIDEO_JOB_STALL_TIMEOUT") or render_timeout)
+    # Pending jobs get no updates while queued: allow for the renders already running
+    # plus a full queue draining through every worker, each at the render timeout
+    queue_rounds = math.ceil(int(os.getenv("VIDEO_QUEUE_MAX_DEPTH", "200")) / int(os.getenv("VIDEO_CONCURRENCY", "3")))
+    pending_after = float(os.getenv("VIDEO_JOB_QUEUE_TIMEOUT") or (queue_rounds + 1) * render_timeout)
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            store = get_job_store()
+            stalled = await store.fail_stalled(processing_after, pending_after)
+            if stalled:
+                print(f"Video job sweeper failed {stalled} stalled jobs")
+            removed = await store.sweep(max_age)
+            if removed:
+                print(f"Video job sweeper removed {removed} finished jobs")
+        except Exception as e:
+            print(f"Video job sweep failed: {e}")
@@ -0,0 +1,321 @@
+# backend/services/llm.py
+"""
+Shared async Anthropic client and LLM gateway for the chat, email and
+recommendation services.
+"""
+import os
+import json
+import time
+import random
+import asyncio
+from typing import Any, AsyncIterator, Callable, Optional
+
+import anthropic
+
+from services import metrics
+from services.inflight import Inflight
+from services.llm_cache import get_cache, make_key
+
+# Same set the SDK retries by default: timeouts, conflicts, rate limits and any 5xx
+# (529 = overloaded); connection errors are retried too
+RETRYABLE_STATUS = {408, 409, 429}
+
+# App-lifetime client, created by init_client() from the FastAPI lifespan hook
+_client: Optional[anthropic.AsyncAnthropic] = None
+# Caps in-flight gateway calls per worker (LLM_MAX_CONCURRENCY)
+_semaphore: Optional[asyncio.Semaphore] = None
+# Cache key -> in-flight call, so identical concurrent prompts share one request
+_inflight = Inflight()
+
+
+def init_client() -> anthropic.AsyncAnthropic:
+    """Create the shared AsyncAnthropic client (one connection pool per worker)."""
+    global _client
+
+    if _client is None:
+        _client = anthropic.AsyncAnthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"),
+            timeout=float(os.getenv("ANTHROPIC_TIMEOUT", "60"))
+        )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client and its pooled connections."""
+    global _client
+
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def get_client() -> anthropic.AsyncAnthropic:
+    # Lazily initialise when used outside the app lifespan (scripts, REPL)
+    return _client or init_client()
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+    return _semaphore
+
+
+def _error_label(error: anthropic.APIError) -> str:
+    if isinstance(error, anthropic.APIStatusError):
+        return str(error.status_code)
+    return "timeout" if isinstance(error, anthropic.APITimeoutError) else "connection"
+
+
+def _is_retryable(error: anthropic.APIError) -> bool:
+    if isinstance(error, anthropic.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return isinstance(error, anthropic.APIConnectionError)
+
+
+def _retry_delay(error: anthropic.APIError, attempt: int) -> float:
+    """Honour Retry-After when the API sends it, otherwise exponential backoff with jitter."""
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), 60.0)
+        except ValueError:
+            pass
+    base = float(os.getenv("LLM_RETRY_BASE_DELAY", "1"))
+    return min(base * 2 ** attempt, 30.0) * random.uniform(0.8, 1.2)
+
+
+async def create_message(purpose: str, **params) -> anthropic.types.Message:
+    """
+    Send one Messages API call through the gateway.
+    `purpose` labels the latency/token metrics (e.g. "email", "recommendations").
+    """
+    max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    # Retries are handled here so the backoff sleep happens outside the semaphore
+    client = get_client().with_options(max_retries=0)
+
+    for attempt in range(max_retries + 1):
+        async with _get_semaphore():
+            start = time.perf_counter()
+            try:
+                response = await client.messages.create(**params)
+            except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                status = _error_label(e)
+                metrics.incr(f"llm.{purpose}.errors.{status}")
+                if not _is_retryable(e) or attempt == max_retries:
+                    raise
+                delay = _retry_delay(e, attempt)
+            else:
+                metrics.observe(f"llm.{purpose}.latency_ms", (time.perf_counter() - start) * 1000)
+                metrics.incr(f"llm.{purpose}.calls")
+                metrics.incr(f"llm.{purpose}.input_tokens", response.usage.input_tokens)
+                metrics.incr(f"llm.{purpose}.output_tokens", response.usage.output_tokens)
+                return response
+
+        metrics.incr(f"llm.{purpose}.retries")
+        print(f"LLM {purpose} call got {status}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+        await asyncio.sleep(delay)
+
+
+async def complete(purpose: str, cache: bool = False, parse=None, **params):
+    """
+    Return the text of a Messages API call, optionally through the response cache.
+    `parse` (e.g. json.loads) runs before caching so malformed output is never
+    stored; its result is what gets returned.
+    """
+    store = get_cache() if cache else None
+    if store is None:
+        response = await create_message(purpose, **params)
+        text = response.content[0].text
+        return parse(text) if parse else text
+
+    key = make_key(params)
+    text = await store.get(key)
+    if text is None:
+        task, started = _inflight.start(key, lambda: _complete_and_store(purpose, store, key, parse, params))
+        metrics.incr(f"llm.{purpose}.cache_misses" if started else f"llm.{purpose}.cache_hits")
+        text = await _inflight.wait(task)
+    else:
+        metrics.incr(f"llm.{purpose}.cache_hits")
+
+    _record_cache_hit_rate(purpose)
+    return parse(text) if parse else text
+
+
+def _record_cache_hit_rate(purpose: str) -> None:
+    metrics.gauge(
+        f"llm.{purpose}.cache_hit_rate",
+        metrics.ratio(f"llm.{purpose}.cache_hits", f"llm.{purpose}.cache_misses")
+    )
+
+
+async def _complete_and_store(purpose: str, store, key: str, parse, params: dict) -> str:
+    response = await create_message(purpose, **params)
+    text = response.content[0].text
+    if parse:
+        parse(text)
+    await store.set(key, text)
+    return text
+
+
+class StructuredOutputError(Exception):
+    """The model's tool input didn't validate, even after the repair attempt."""
+
+
+def _tool_input(response: anthropic.types.Message, tool_name: str) -> Any:
+    for block in response.content:
+        if block.type == "tool_use" and block.name == tool_name:
+            return block.input
+    raise ValueError(f"no {tool_name} call in the response (stop_reason={response.stop_reason})")
+
+
+async def complete_structured(
+    purpose: str,
+    tool: dict,
+    validate: Callable[[Any], Any],
+    cache: bool = False,
+    **params
+):
+    """
+    Force a call to `tool` and return `validate(tool input)`.
+    `validate` raises on bad output; the model then gets one repair turn that
+    shows it its own output and the error. Failed attempts are counted in
+    `llm.{purpose}.failed_calls`, and the tokens they were billed for in
+    `wasted_input_tokens` / `wasted_output_tokens`.
+    """
+    params = {**params, "tools": [tool], "tool_choice": {"type": "tool", "name": tool["name"]}}
+    store = get_cache() if cache else None
+    if store is None:
+        return validate(await _structured_call(purpose, tool["name"], validate, params))
+
+    key = make_key(params)
+    cached = await store.get(key)
+    if cached is not None:
+        metrics.incr(f"llm.{purpose}.cache_hits")
+        _record_cache_hit_rate(purpose)
+        return validate(json.loads(cached))
+
+    task, started = _inflight.start(
+        key, lambda: _structured_and_store(purpose, store, key, tool["name"], validate, params)
+    )
+    metrics.incr(f"llm.{purpose}.cache_misses" if started else f"llm.{purpose}.cache_hits")
+    _record_cache_hit_rate(purpose)
+    return validate(await _inflight.wait(task))
+
+
+async def _structured_and_store(purpose: str, store, key: str, tool_name: str, validate: Callable[[Any], Any], params: dict) -> Any:
+    # Only output that passed validation is cached
+    data = await _structured_call(purpose, tool_name, validate, params)
+    await store.set(key, json.dumps(data))
+    return data
+
+
+async def _structured_call(purpose: str, tool_name: str, validate: Callable[[Any], Any], params: dict) -> Any:
+    """Tool input that passed `validate`, after at most one repair turn."""
+    response = await create_message(purpose, **params)
+    try:
+        data = _tool_input(response, tool_name)
+        validate(data)
+        _record_structured(purpose, ok=True)
+        return data
+    except Exception as e:
+        error = e
+        _record_structured(purpose, ok=False, wasted=response.usage)
+        print(f"LLM {purpose} output invalid, repairing: {error}")
+
+    # Repair turn: keep the first answer in the conversation so the model fixes it
+    # rather than starting over
+    tool_use = next((b for b in response.content if b.type == "tool_use"), None)
+    if tool_use is not None:
+        repair = [
+            {"role": "assistant", "content": [{"type": "tool_use", "id": tool_use.id, "name": tool_use.name, "input": tool_use.input}]},
+            {"role": "user", "content": [{
+                "type": "tool_result",
+                "tool_use_id": tool_use.id,
+                "is_error": True,
+                "content": f"Invalid input: {error}. Call {tool_name} again with the complete, corrected input."
+            }]},
+        ]
+    else:
+        partial = "".join(b.text for b in response.content if b.type == "text")
+        repair = [
+            {"role": "assistant", "content": partial or "(no output)"},
+            {"role": "user", "content": f"That was not a valid {tool_name} call ({error}). Call {tool_name} with the complete input."},
+        ]
+
+    response = await create_message(purpose, **{**params, "messages": [*params["messages"], *repair]})
+    try:
+        data = _tool_input(response, tool_name)
+        validate(data)
+    except Exception as e:
+        _record_structured(purpose, ok=False, wasted=response.usage)
+        raise StructuredOutputError(f"{purpose} output still invalid after repair: {e}") from e
+    _record_structured(purpose, ok=True)
+    metrics.incr(f"llm.{purpose}.repairs")
+    return data
+
+
+def _record_structured(purpose: str, ok: bool, wasted: Optional[anthropic.types.Usage] = None) -> None:
+    metrics.incr(f"llm.{purpose}.{'valid' if ok else 'failed'}_calls")
+    if wasted is not None:
+        # A failed attempt is billed in full: the prompt as well as the bad answer
+        metrics.incr(f"llm.{purpose}.wasted_input_tokens", wasted.input_tokens)
+        metrics.incr(f"llm.{purpose}.wasted_output_tokens", wasted.output_tokens)
+    metrics.gauge(
+        f"llm.{purpose}.failed_call_rate",
+        metrics.ratio(f"llm.{purpose}.failed_calls", f"llm.{purpose}.valid_calls")
+    )
+
+
+async def stream_text(purpose: str, cache: bool = False, **params) -> AsyncIterator[str]:
+    """
+    Stream the text of a Messages API call as it is generated.
+    Same semaphore, retries (until the first delta) and metrics as create_message;
+    with `cache`, a cached answer is replayed and a fresh one is stored.
+    """
+    store = get_cache() if cache else None
+    key = make_key(params) if store is not None else None
+    if store is not None:
+        text = await store.get(key)
+        if text is not None:
+            metrics.incr(f"llm.{purpose}.cache_hits")
+            yield text
+            return
+        metrics.incr(f"llm.{purpose}.cache_misses")
+
+    max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    client = get_client().with_options(max_retries=0)
+
+    for attempt in range(max_retries + 1):
+        parts: list[str] = []
+        async with _get_semaphore():
+            start = time.perf_counter()
+            try:
+                async with client.messages.stream(**params) as stream:
+                    async for text in stream.text_stream:
+                        if not parts:
+                            metrics.observe(f"llm.{purpose}.ttft_ms", (time.perf_counter() - start) * 1000)
+                        parts.append(text)
+                        yield text
+                    response = await stream.get_final_message()
+            except (anthropic.APIStatusError, anthropic.APIConnectionError) as e:
+                status = _error_label(e)
+                metrics.incr(f"llm.{purpose}.errors.{status}")
+                # Once text has reached the caller a retry would duplicate it
+                if parts or not _is_retryable(e) or attempt == max_retries:
+                    raise
+                delay = _retry_delay(e, attempt)
+            else:
+                metrics.observe(f"llm.{purpose}.latency_ms", (time.perf_counter() - start) * 1000)
+                metrics.incr(f"llm.{purpose}.calls")
+                metrics.incr(f"llm.{purpose}.input_tokens", response.usage.input_tokens)
+                metrics.incr(f"llm.{purpose}.output_tokens", response.usage.output_tokens)
+                if store is not None:
+                    await store.set(key, "".join(parts))
+                return
+
+        metrics.incr(f"llm.{purpose}.retries")
+        print(f"LLM {purpose} stream got {status}, retrying in {delay:.1f}s (attempt {attempt + 1}/{max_retries})")
+        await asyncio.sleep(delay)
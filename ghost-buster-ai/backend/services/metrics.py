@@ -0,0 +1,54 @@
+# backend/services/metrics.py
+"""
+Minimal in-process metrics (counters, gauges, latency stats) served on GET /metrics.
+Per worker only - good enough to eyeball behaviour without a metrics stack.
+"""
+from collections import defaultdict
+
+_counters: dict[str, float] = defaultdict(float)
+_gauges: dict[str, float] = {}
+_timings: dict[str, dict[str, float]] = {}
+
+
+def incr(name: str, value: float = 1) -> None:
+    """Add to a monotonically increasing counter."""
+    _counters[name] += value
+
+
+def gauge(name: str, value: float) -> None:
+    """Set a point-in-time value (queue depth, cache size...)."""
+    _gauges[name] = value
+
+
+def observe(name: str, value: float) -> None:
+    """Record one sample of a distribution, typically a latency in ms."""
+    stats = _timings.get(name)
+    if stats is None:
+        _timings[name] = {"count": 1, "total": value, "min": value, "max": value}
+        return
+    stats["count"] += 1
+    stats["total"] += value
+    stats["min"] = min(stats["min"], value)
+    stats["max"] = max(stats["max"], value)
+
+
+def ratio(hits: str, misses: str) -> float:
+    """Hit rate from two counters, 0 when nothing was recorded yet."""
+    total = _counters.get(hits, 0) + _counters.get(misses, 0)
+    return round(_counters.get(hits, 0) / total, 4) if total else 0.0
+
+
+def snapshot() -> dict:
+    return {
+        "counters": dict(_counters),
+        "gauges": dict(_gauges),
+        "timings": {
+            name: {
+                "count": stats["count"],
+                "avg": round(stats["total"] / stats["count"], 2),
+                "min": round(stats["min"], 2),
+                "max": round(stats["max"], 2),
+            }
+            for name, stats in _timings.items()
+        },
+    }
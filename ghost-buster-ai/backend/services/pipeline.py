@@ -0,0 +1,253 @@
+# backend/services/pipeline.py
+"""
+Analysis pipeline stages shared by the HTTP endpoints:
+HRFlow data -> (recommendations || email) -> AnalysisResult.
+"""
+import os
+import json
+import asyncio
+from typing import AsyncIterator, Optional
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from models.schemas import AnalysisResult, SkillItem, CandidateInfo, ChatContext, Recommendation, CourseItem
+from services.email import generate_rejection_email, stream_rejection_email
+from services.hrflow import generate_recommendations, get_compiled_job, get_job_scores, prepare_analyses
+from services.streaming import coalesce_text_stream
+
+
+async def finish_analysis(analysis: dict, roast_mode: bool = False, deterministic: bool = False) -> AnalysisResult:
+    """Run the LLM stages for a prepared analysis and build the API response."""
+
+    # Recommendations and rejection email (or roast email) only need the
+    # skill analysis, so both LLM calls run side by side
+    analysis["recommendations"], email = await asyncio.gather(
+        generate_recommendations(
+            analysis["skill_gaps"],
+            analysis["strengths"],
+            analysis["job"]["title"]
+        ),
+        generate_rejection_email(
+            candidate=analysis["profile"],
+            job=analysis["job"],
+            gaps=analysis["skill_gaps"],
+            strengths=analysis["strengths"],
+            language=analysis["detected_language"],
+            roast_mode=roast_mode,
+            deterministic=deterministic
+        )
+    )
+
+    return build_result(analysis, email)
+
+
+def _event(event_type: str, **fields) -> str:
+    return json.dumps(jsonable_encoder({"type": event_type, **fields})) + "\n"
+
+
+async def stream_analysis(analysis: dict, roast_mode: bool = False, deterministic: bool = False) -> AsyncIterator[str]:
+    """
+    finish_analysis as NDJSON events, each sent as soon as it is known:
+    "analysis" (score and skills, empty email), "email_delta" (text chunks),
+    "recommendations", then "result" with the full AnalysisResult,
+    or "error" if an LLM stage fails.
+    """
+    analysis["recommendations"] = []
+    yield _event("analysis", result=build_result(analysis, ""))
+
+    # Recommendations and email run side by side; whichever has output goes first
+    queue: asyncio.Queue = asyncio.Queue()
+    email_parts: list[str] = []
+
+    async def recommendations():
+        try:
+            queue.put_nowait(("recommendations", await generate_recommendations(
+                analysis["skill_gaps"],
+                analysis["strengths"],
+                analysis["job"]["title"]
+            )))
+        except Exception as e:
+            queue.put_nowait(("error", e))
+
+    async def email():
+        async def deltas():
+            async for text in stream_rejection_email(
+                candidate=analysis["profile"],
+                job=analysis["job"],
+                gaps=analysis["skill_gaps"],
+                strengths=analysis["strengths"],
+                language=analysis["detected_language"],
+                roast_mode=roast_mode,
+                deterministic=deterministic
+            ):
+                email_parts.append(text)
+                yield text
+
+        try:
+            async for line in coalesce_text_stream(
+                deltas(),
+                "analyze_email",
+                frame=lambda text: _event("email_delta", text=text),
+                heartbeat_line=_event("heartbeat")
+            ):
+                queue.put_nowait(("line", line))
+            queue.put_nowait(("email", None))
+        except Exception as e:
+            queue.put_nowait(("error", e))
+
+    tasks = [asyncio.ensure_future(recommendations()), asyncio.ensure_future(email())]
+    try:
+        remaining = len(tasks)
+        while remaining:
+            kind, value = await queue.get()
+            if kind == "line":
+                yield value
+            elif kind == "recommendations":
+                analysis["recommendations"] = value
+                yield _event("recommendations", recommendations=build_result(analysis, "").recommendations)
+                remaining -= 1
+            elif kind == "email":
+                remaining -= 1
+            else:
+                print(f"Streaming analysis failed: {value}")
+                yield _event("error", error=f"Analysis failed: {value}")
+                return
+
+        yield _event("result", result=build_result(analysis, "".join(email_parts)))
+    finally:
+        # Client went away: stop both LLM calls
+        for task in tasks:
+            task.cancel()
+
+
+def build_result(analysis: dict, email: str) -> AnalysisResult:
+    """Convert a finished analysis dict into the AnalysisResult response model."""
+    candidate_name = f"{analysis['profile'].get('first_name', '')} {analysis['profile'].get('last_name', '')}".strip()
+
+    skill_gaps = [
+        SkillItem(
+            name=gap["name"],
+            candidateLevel=gap["candidateLevel"],
+            requiredLevel=gap["requiredLevel"]
+        )
+        for gap in analysis["skill_gaps"]
+    ]
+
+    strengths = [
+        SkillItem(
+            name=s["name"],
+            candidateLevel=s["candidateLevel"],
+            requiredLevel=s["requiredLevel"]
+        )
+        for s in analysis["strengths"]
+    ]
+
+    # Convert recommendations to Recommendation objects
+    recommendations = [
+        Recommendation(
+            type=rec.get("type", "hardskill"),
+            skill=rec.get("skill"),
+            title=rec.get("title", ""),
+            description=rec.get("description", ""),
+            courses=[
+                CourseItem(
+                    name=c.get("name", ""),
+                    platform=c.get("platform", ""),
+                    url=c.get("url", "")
+                )
+                for c in rec.get("courses", [])
+            ]
+        )
+        for rec in analysis["recommendations"]
+    ]
+
+    chat_context = ChatContext(
+        candidateName=analysis["profile"].get("first_name") or candidate_name or "Candidate",
+        jobTitle=analysis["job"]["title"],
+        jobKey=analysis["job"].get("key"),
+        skillGaps=skill_gaps,
+        strengths=strengths,
+        recommendations=recommendations
+    )
+
+    return AnalysisResult(
+        score=analysis["score"],
+        threshold=0.8,
+        matched=analysis["score"] >= 0.8,
+        detectedLanguage=analysis["detected_language"],
+        candidate=CandidateInfo(
+            name=candidate_name or "Candidate",
+            email=analysis["profile"].get("email")
+        ),
+        skillGaps=skill_gaps,
+        strengths=strengths,
+        recommendations=recommendations,
+        email=email,
+        videoUrl=None,
+        chatContext=chat_context
+    )
+
+
+async def analyze_many(
+    job_data: dict,
+    job_key: str,
+    profile_keys: list[str],
+    roast_mode: bool = False,
+    deterministic: bool = False,
+    concurrency: Optional[int] = None
+) -> AsyncIterator[dict]:
+    """
+    Analyze many profiles against one already-fetched job.
+    The job's scores are swept once and profiles are fetched and skill-analyzed
+    in chunks (BATCH_CHUNK_SIZE); the per-candidate LLM work runs with bounded
+    concurrency and results are yielded as each candidate completes.
+    """
+    concurrency = concurrency or int(os.getenv("BATCH_CONCURRENCY", "5"))
+    chunk_size = int(os.getenv("BATCH_CHUNK_SIZE", "50"))
+    job = get_compiled_job(job_key, job_data)
+
+    try:
+        scores = await get_job_scores(job_key)
+    except Exception as e:
+        print(f"Scoring sweep failed for job {job_key}: {e}")
+        scores = {}
+
+    # Prepared analyses wait here for an LLM worker; bounded so fetching stays about a chunk ahead
+    prepared: asyncio.Queue = asyncio.Queue(maxsize=chunk_size)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def prepare() -> None:
+        for start in range(0, len(profile_keys), chunk_size):
+            chunk = profile_keys[start:start + chunk_size]
+            try:
+                items = await prepare_analyses(job, chunk, scores)
+            except Exception as e:
+                items = [(profile_key, e) for profile_key in chunk]
+            for item in items:
+                await prepared.put(item)
+
+    async def run_one(profile_key: str, analysis) -> dict:
+        try:
+            if isinstance(analysis, BaseException):
+                raise analysis
+            result = await finish_analysis(analysis, roast_mode=roast_mode, deterministic=deterministic)
+            return {"profile_key": profile_key, "status": "ok", "result": result}
+        except HTTPException as e:
+            return {"profile_key": profile_key, "status": "error", "error": e.detail}
+        except Exception as e:
+            print(f"Batch analysis failed for profile {profile_key}: {e}")
+            return {"profile_key": profile_key, "status": "error", "error": str(e)}
+
+    async def worker() -> None:
+        while True:
+            profile_key, analysis = await prepared.get()
+            results.put_nowait(await run_one(profile_key, analysis))
+
+    tasks = [asyncio.ensure_future(prepare())] + [asyncio.ensure_future(worker()) for _ in range(concurrency)]
+    try:
+        for _ in profile_keys:
+            yield await results.get()
+    finally:
+        # Client went away or the caller stopped early: don't keep paying for LLM calls
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,103 @@
+# backend/services/replica.py
+"""
+Local SQLite replica of HRFlow profiles and jobs.
+Full documents are stored as JSON, keyed by (container, key), next to the
+HRFlow edition date they were synced at. hrflow.sync_replica() keeps it up to
+date incrementally; get_profile/get_job read it first and fall back to HRFlow.
+Deletions are not replicated: a deleted document lingers until the file is
+removed, which is harmless for rejection emails.
+"""
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+from typing import Optional
+
+KINDS = ("profile", "job")
+
+
+class Replica:
+    def __init__(self, path: str):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for kind in KINDS:
+            self._conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {kind}s ("
+                " container_key TEXT NOT NULL, key TEXT NOT NULL,"
+                " data TEXT NOT NULL, edited_at TEXT, synced_at REAL NOT NULL,"
+                " PRIMARY KEY (container_key, key))"
+            )
+        # Newest edition date seen per (kind, container): where the next sync stops
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            " kind TEXT NOT NULL, container_key TEXT NOT NULL, edited_at TEXT NOT NULL,"
+            " PRIMARY KEY (kind, container_key))"
+        )
+
+    def _get(self, kind: str, container_key: str, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT data FROM {kind}s WHERE container_key = ? AND key = ?", (container_key, key)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _put_many(self, kind: str, container_key: str, documents: list[tuple[str, dict, Optional[str]]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO {kind}s (container_key, key, data, edited_at, synced_at) VALUES (?, ?, ?, ?, ?)",
+                    [(container_key, key, json.dumps(data, ensure_ascii=False), edited_at, now) for key, data, edited_at in documents]
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _high_water(self, kind: str, container_key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT edited_at FROM sync_state WHERE kind = ? AND container_key = ?", (kind, container_key)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _set_high_water(self, kind: str, container_key: str, edited_at: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (kind, container_key, edited_at) VALUES (?, ?, ?)",
+                (kind, container_key, edited_at)
+            )
+
+    async def get(self, kind: str, container_key: str, key: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._get, kind, container_key, key)
+
+    async def put(self, kind: str, container_key: str, key: str, data: dict, edited_at: Optional[str] = None) -> None:
+        await asyncio.to_thread(self._put_many, kind, container_key, [(key, data, edited_at)])
+
+    async def put_many(self, kind: str, container_key: str, documents: list[tuple[str, dict, Optional[str]]]) -> None:
+        await asyncio.to_thread(self._put_many, kind, container_key, documents)
+
+    async def high_water(self, kind: str, container_key: str) -> Optional[str]:
+        return await asyncio.to_thread(self._high_water, kind, container_key)
+
+    async def set_high_water(self, kind: str, container_key: str, edited_at: str) -> None:
+        await asyncio.to_thread(self._set_high_water, kind, container_key, edited_at)
+
+
+_replica: Optional[Replica] = None
+_replica_ready = False
+
+
+def get_replica() -> Optional[Replica]:
+    """The replica when HRFLOW_REPLICA_PATH is set, else None (always read HRFlow)."""
+    global _replica, _replica_ready
+
+    if not _replica_ready:
+        path = os.getenv("HRFLOW_REPLICA_PATH")
+        _replica = Replica(path) if path else None
+        _replica_ready = True
+    return _replica
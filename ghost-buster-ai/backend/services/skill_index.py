@@ -0,0 +1,174 @@
+# backend/services/skill_index.py
+"""
+Skill name normalization: maps free-text skill names to canonical IDs so
+"Python 3", "python" and "Python programming" are one skill.
+Resolution order: exact alias -> same words in any order (or with spaces
+dropped) -> word-by-word character-trigram fuzzy match against the alias table. Unknown skills fall back to their
+normalized text. Every lookup structure is built once; results are memoized.
+"""
+import os
+import re
+import json
+import functools
+from collections import defaultdict
+from typing import Optional
+
+# Canonical ID -> aliases. Extend or override with SKILL_ALIASES_PATH (same JSON shape).
+SKILL_ALIASES: dict[str, list[str]] = {
+    "python": ["python3", "py"],
+    "javascript": ["js", "ecmascript", "java script", "es6"],
+    "typescript": ["ts"],
+    "node.js": ["node", "nodejs", "node js"],
+    "react": ["react.js", "reactjs", "react js"],
+    "vue.js": ["vue", "vuejs"],
+    "angular": ["angularjs", "angular.js"],
+    "c++": ["cpp"],
+    "c#": ["csharp", "c sharp"],
+    "go": ["golang"],
+    "html": ["html5"],
+    "css": ["css3"],
+    "sql": ["sql language"],
+    "postgresql": ["postgres", "psql"],
+    "mongodb": ["mongo"],
+    "rest api": ["rest", "restful api", "restful apis", "rest apis"],
+    "docker": ["docker compose"],
+    "kubernetes": ["k8s"],
+    "amazon web services": ["aws"],
+    "google cloud platform": ["gcp", "google cloud"],
+    "microsoft azure": ["azure"],
+    "ci/cd": ["cicd", "continuous integration", "continuous delivery"],
+    "machine learning": ["ml"],
+    "deep learning": ["dl"],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "pytorch": ["torch"],
+    "microsoft excel": ["excel", "ms excel"],
+    "project management": ["project manager"],
+    "communication": ["communication skills", "communicating"],
+    "teamwork": ["team work", "team player", "collaboration"],
+    "problem solving": ["problem-solving", "problem solver"],
+    "leadership": ["team leadership", "leading teams"],
+}
+
+# Words that qualify a skill without changing it ("Python programming")
+_FILLER_WORDS = {"programming", "language", "languages", "framework", "skills", "skill"}
+_VERSION = re.compile(r"^v?\d+(\.\d+)*$")
+_SEPARATORS = re.compile(r"[^\w+#.]+")
+
+
+def normalize(name: str) -> str:
+    """Lowercase, unify separators, drop versions and filler words."""
+    words = _SEPARATORS.sub(" ", name.lower()).replace("_", " ").split()
+    words = [w if w == ".net" else w.strip(".") for w in words]
+    words = [w for w in words if w]
+    core = [w for w in words if not _VERSION.match(w) and w not in _FILLER_WORDS]
+    # "Development" or "3" alone is still a skill name
+    return " ".join(core or words)
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SkillIndex:
+    def __init__(self, aliases: dict[str, list[str]], fuzzy_threshold: float = 0.75, cache_size: int = 10000):
+        self.fuzzy_threshold = fuzzy_threshold
+        self._exact: dict[str, str] = {}
+        self._by_words: dict[str, str] = {}
+        self._compact: dict[str, str] = {}
+        self._postings: dict[str, set[str]] = defaultdict(set)
+        self._grams: dict[str, set[str]] = {}
+
+        for canonical, names in aliases.items():
+            canonical_key = normalize(canonical)
+            for alias in [canonical, *names]:
+                key = normalize(alias)
+                if not key:
+                    continue
+                self._exact.setdefault(key, canonical_key)
+                self._by_words.setdefault(" ".join(sorted(key.split())), canonical_key)
+                self._compact.setdefault(key.replace(" ", ""), canonical_key)
+                if len(key) >= 4:
+                    grams = self._grams[key] = _trigrams(key)
+                    for gram in grams:
+                        self._postings[gram].add(key)
+
+        self.canonical = functools.lru_cache(maxsize=cache_size)(self._canonical)
+
+    def _canonical(self, name: str) -> str:
+        """Canonical ID for a skill name (memoized as `canonical`)."""
+        key = normalize(name)
+        if key in self._exact:
+            return self._exact[key]
+        by_words = self._by_words.get(" ".join(sorted(key.split()))) or self._compact.get(key.replace(" ", ""))
+        if by_words:
+            return by_words
+        return self._fuzzy(key) or key
+
+    def _fuzzy(self, key: str) -> Optional[str]:
+        # Short names ("go", "c#") only ever match exactly
+        if len(key) < 4:
+            return None
+        grams = _trigrams(key)
+        shared: dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for candidate in self._postings.get(gram, ()):
+                shared[candidate] += 1
+
+        words = key.split()
+        best, best_score = None, 0.0
+        for candidate in shared:
+            score = self._word_match(words, candidate.split())
+            if score > best_score:
+                best, best_score = candidate, score
+        return self._exact[best] if best is not None else None
+
+    def _word_match(self, words: list[str], candidate: list[str]) -> float:
+        """
+        Mean trigram Dice of aligned words, 0 unless every word matches.
+        Whole-name similarity merges different skills that share most letters
+        ("product management" / "project management", "excel vba" / "excel"),
+        so only typos inside a word are forgiven, never a different or extra word.
+        """
+        if len(words) != len(candidate):
+            return 0.0
+        scores = []
+        for word, other in zip(words, candidate):
+            if word == other:
+                scores.append(1.0)
+                continue
+            if len(word) < 4 or len(other) < 4:
+                return 0.0
+            a, b = _trigrams(word), _trigrams(other)
+            score = 2 * len(a & b) / (len(a) + len(b))
+            if score < self.fuzzy_threshold:
+                return 0.0
+            scores.append(score)
+        return sum(scores) / len(scores)
+
+    def same_skill(self, a: str, b: str) -> bool:
+        return self.canonical(a) == self.canonical(b)
+
+
+_index: Optional[SkillIndex] = None
+
+
+def get_skill_index() -> SkillIndex:
+    """Shared index: built-in aliases plus the optional SKILL_ALIASES_PATH JSON file."""
+    global _index
+
+    if _index is None:
+        aliases = {canonical: list(names) for canonical, names in SKILL_ALIASES.items()}
+        path = os.getenv("SKILL_ALIASES_PATH")
+        if path:
+            with open(path) as f:
+                for canonical, names in json.load(f).items():
+                    aliases.setdefault(canonical, []).extend(names)
+        _index = SkillIndex(aliases, fuzzy_threshold=float(os.getenv("SKILL_FUZZY_THRESHOLD", "0.75")))
+    return _index
+
+
+def canonical_skill(name: str) -> str:
+    return get_skill_index().canonical(name)
@@ -0,0 +1,176 @@
+# backend/services/skill_matrix.py
+"""
+Vectorized skill-gap analysis of one job against many candidates.
+The job's skills form the vocabulary and a requirement vector; candidates are
+encoded as rows of a (candidates x job skills) level matrix, so gaps and
+strengths for a whole batch come out of a few NumPy operations.
+Levels are 0-100, read from HRFlow's skill `value` when it carries one.
+"""
+from typing import Optional
+
+import numpy as np
+
+from services.skill_index import canonical_skill
+
+# Fallback levels for skills HRFlow lists without a value
+DEFAULT_REQUIRED_LEVEL = 70
+DEFAULT_MATCHED_LEVEL = 65
+DEFAULT_EXTRA_LEVEL = 75
+TOP_N = 5
+
+_LEVEL_WORDS = {
+    "beginner": 25, "basic": 25, "elementary": 25,
+    "intermediate": 50, "good": 60,
+    "advanced": 75, "fluent": 80, "proficient": 80,
+    "expert": 90, "native": 100, "bilingual": 100,
+}
+
+
+def _number(value) -> Optional[float]:
+    """Numeric skill value, or None for level words and missing values."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        try:
+            return float(value.strip().rstrip("%"))
+        except ValueError:
+            return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def level_scale(skills: list[dict]) -> float:
+    """
+    Multiplier taking one document's numeric skill values to 0-100.
+    HRFlow values come as 0-1 ratios, 1-5 ratings or percentages, and a document
+    uses one scale for all its skills, so the scale is read from all of them
+    together: per-value guessing would make a rating of 1 outrank a 2.
+    """
+    values = [skill.get("value") for skill in skills]
+    numbers = [(value, _number(value)) for value in values if _number(value) is not None]
+    if not numbers or any(isinstance(value, str) and value.strip().endswith("%") for value, _ in numbers):
+        return 1.0
+    top = max(number for _, number in numbers)
+    # Ratios are fractional; a document of whole numbers up to 5 (even all 1s) is ratings
+    fractional = any(isinstance(value, float) or not number.is_integer() for value, number in numbers)
+    if top <= 1 and fractional:
+        return 100.0
+    if top <= 5:
+        return 20.0
+    return 1.0
+
+
+def skill_level(skill: dict, default: int, scale: float = 1.0) -> int:
+    """0-100 level of an HRFlow skill, given its document's `level_scale`; `default` when its value says nothing."""
+    value = skill.get("value")
+    if isinstance(value, str) and value.strip().lower() in _LEVEL_WORDS:
+        return _LEVEL_WORDS[value.strip().lower()]
+    number = _number(value)
+    if number is None:
+        return default
+    return int(round(min(max(number * scale, 0), 100)))
+
+
+class SkillVocabulary:
+    """Skill name <-> column index, keyed by canonical skill ID."""
+
+    def __init__(self):
+        self.index: dict[str, int] = {}
+        self.names: list[str] = []
+
+    def add(self, name: str) -> int:
+        key = canonical_skill(name)
+        if key not in self.index:
+            self.index[key] = len(self.names)
+            self.names.append(name)
+        return self.index[key]
+
+    def get(self, name: str) -> Optional[int]:
+        return self.index.get(canonical_skill(name))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class JobRequirements:
+    """A job's skill vocabulary and required-level vector, built once per job."""
+
+    def __init__(self, job_data: dict):
+        self.vocabulary = SkillVocabulary()
+        levels: list[int] = []
+        skills = job_data.get("skills") or []
+        scale = level_scale(skills)
+        for skill in skills:
+            name = skill.get("name")
+            if not name:
+                continue
+            column = self.vocabulary.add(name)
+            level = skill_level(skill, DEFAULT_REQUIRED_LEVEL, scale)
+            if column == len(levels):
+                levels.append(level)
+            else:
+                levels[column] = max(levels[column], level)
+        self.required = np.array(levels, dtype=np.int16)
+
+    def encode(self, profiles: list[dict]) -> tuple[np.ndarray, np.ndarray, list[list[tuple[str, int]]]]:
+        """
+        Returns (levels, has, extras): the candidates' levels on the job's skills,
+        which of those skills each candidate lists, and per-candidate
+        (name, level) for skills the job doesn't ask for.
+        """
+        levels = np.zeros((len(profiles), len(self.vocabulary)), dtype=np.int16)
+        has = np.zeros(levels.shape, dtype=bool)
+        extras: list[list[tuple[str, int]]] = []
+
+        for row, profile in enumerate(profiles):
+            seen_extra: set[str] = set()
+            candidate_extras: list[tuple[str, int]] = []
+            skills = profile.get("skills") or []
+            scale = level_scale(skills)
+            for skill in skills:
+                name = skill.get("name")
+                if not name:
+                    continue
+                column = self.vocabulary.get(name)
+                if column is not None:
+                    level = skill_level(skill, DEFAULT_MATCHED_LEVEL, scale)
+                    levels[row, column] = max(levels[row, column], level) if has[row, column] else level
+                    has[row, column] = True
+                elif canonical_skill(name) not in seen_extra:
+                    seen_extra.add(canonical_skill(name))
+                    candidate_extras.append((name, skill_level(skill, DEFAULT_EXTRA_LEVEL, scale)))
+            extras.append(candidate_extras)
+
+        return levels, has, extras
+
+    def analyze(self, profiles: list[dict]) -> list[dict]:
+        """{"gaps", "strengths"} (top 5 each) for every profile, in one pass."""
+        levels, has, extras = self.encode(profiles)
+        required = np.broadcast_to(self.required, levels.shape)
+
+        # Missing skills count as level 0; a gap is any job skill below its requirement
+        deficit = required.astype(np.int32) - levels
+        is_gap = deficit > 0
+        is_strength = has & ~is_gap
+
+        # Stable sorts keep the job's skill order among ties
+        gap_order = np.argsort(np.where(is_gap, -deficit, 1), axis=1, kind="stable")[:, :TOP_N]
+        strength_order = np.argsort(np.where(is_strength, -levels.astype(np.int32), 1), axis=1, kind="stable")[:, :TOP_N]
+
+        names = self.vocabulary.names
+        results = []
+        for row in range(len(profiles)):
+            gaps = [
+                {"name": names[c], "candidateLevel": int(levels[row, c]), "requiredLevel": int(self.required[c])}
+                for c in gap_order[row] if is_gap[row, c]
+            ]
+            strengths = [
+                {"name": names[c], "candidateLevel": int(levels[row, c]), "requiredLevel": int(self.required[c])}
+                for c in strength_order[row] if is_strength[row, c]
+            ]
+            strengths += [{"name": name, "candidateLevel": level, "requiredLevel": 0} for name, level in extras[row]]
+            strengths.sort(key=lambda s: s["candidateLevel"], reverse=True)
+            results.append({"gaps": gaps, "strengths": strengths[:TOP_N]})
+        return results
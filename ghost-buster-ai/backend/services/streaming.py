@@ -0,0 +1,112 @@
+# backend/services/streaming.py
+"""
+Stream writer that coalesces text deltas (Vercel AI data stream by default).
+The model emits a delta every few milliseconds; writing each as its own
+`0:` line means one tiny write per token. The first delta goes out at once
+(time to first token is what users feel), later ones are batched for up to
+STREAM_COALESCE_MS or STREAM_COALESCE_BYTES. Idle streams get heartbeat
+lines so proxies don't time them out.
+"""
+import os
+import json
+import time
+import asyncio
+from typing import AsyncIterator, Callable
+
+from services import metrics
+
+# Empty data part: keeps the connection alive, ignored by Vercel AI SDK clients
+HEARTBEAT = "2:[]\n"
+_DONE = object()
+
+
+def vercel_text_part(text: str) -> str:
+    return f"0:{json.dumps(text)}\n"
+
+
+async def coalesce_text_stream(
+    deltas: AsyncIterator[str],
+    name: str,
+    frame: Callable[[str], str] = vercel_text_part,
+    heartbeat_line: str = HEARTBEAT
+) -> AsyncIterator[str]:
+    """
+    Re-emit text deltas as framed lines (Vercel `0:"..."` parts by default),
+    batched, with heartbeats and metrics.
+    """
+    window = float(os.getenv("STREAM_COALESCE_MS", "50")) / 1000
+    max_bytes = int(os.getenv("STREAM_COALESCE_BYTES", "2048"))
+    heartbeat = float(os.getenv("STREAM_HEARTBEAT_INTERVAL", "15"))
+
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        # Reads upstream on its own task so flush/heartbeat timers don't wait on it
+        try:
+            async for text in deltas:
+                queue.put_nowait(text)
+            queue.put_nowait(_DONE)
+        except Exception as e:
+            queue.put_nowait(e)
+
+    started_at = time.monotonic()
+    first_at = None
+    count = 0
+    sent = 0
+    buffer: list[str] = []
+    buffered = 0
+    flush_at = 0.0
+    reader = asyncio.create_task(pump())
+
+    def line(text: str) -> str:
+        nonlocal sent
+        chunk = frame(text)
+        sent += len(chunk.encode("utf-8"))
+        metrics.incr(f"stream.{name}.writes")
+        return chunk
+
+    try:
+        while True:
+            timeout = max(0.0, flush_at - time.monotonic()) if buffer else heartbeat
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                if buffer:
+                    yield line("".join(buffer))
+                    buffer, buffered = [], 0
+                else:
+                    sent += len(heartbeat_line)
+                    metrics.incr(f"stream.{name}.heartbeats")
+                    yield heartbeat_line
+                continue
+
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+
+            count += 1  # text deltas, roughly one token each
+            if first_at is None:
+                first_at = time.monotonic()
+                metrics.observe(f"stream.{name}.ttft_ms", (first_at - started_at) * 1000)
+                yield line(item)
+                continue
+
+            if not buffer:
+                flush_at = time.monotonic() + window
+            buffer.append(item)
+            buffered += len(item)
+            if buffered >= max_bytes:
+                yield line("".join(buffer))
+                buffer, buffered = [], 0
+
+        if buffer:
+            yield line("".join(buffer))
+    finally:
+        reader.cancel()
+        if first_at is not None:
+            elapsed = time.monotonic() - first_at
+            if elapsed > 0:
+                metrics.observe(f"stream.{name}.tokens_per_s", count / elapsed)
+        metrics.observe(f"stream.{name}.bytes_sent", sent)
+        metrics.incr(f"stream.{name}.bytes_sent_total", sent)
@@ -0,0 +1,83 @@
+# backend/services/swr_cache.py
+"""
+Small stale-while-revalidate cache for listings that change rarely.
+Fresh entries are served as is; stale ones are served immediately while a
+single background refresh runs; only missing or long-expired entries make the
+caller wait. Each entry carries an ETag so clients can revalidate with 304s.
+"""
+import json
+import time
+import asyncio
+import hashlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from services import metrics
+from services.inflight import Inflight
+
+
+def make_etag(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return '"' + hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+class SWRCache:
+    """
+    `ttl` is how long an entry is fresh; for `stale_ttl` seconds after that it
+    is still served while being refreshed in the background.
+    """
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float, max_entries: int):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        # key -> (fetched_at, value, etag)
+        self._entries: OrderedDict[Hashable, tuple[float, Any, str]] = OrderedDict()
+        self._inflight = Inflight()
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> tuple[Any, str]:
+        """Return (value, etag), loading with `load()` when needed."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            fetched_at, value, etag = entry
+            age = time.monotonic() - fetched_at
+            if age < self.ttl:
+                metrics.incr(f"{self.name}.cache_hits")
+                self._entries.move_to_end(key)
+                return value, etag
+            if age < self.ttl + self.stale_ttl:
+                metrics.incr(f"{self.name}.cache_stale")
+                self._entries.move_to_end(key)
+                self._refresh(key, load)
+                return value, etag
+
+        metrics.incr(f"{self.name}.cache_misses")
+        return await self._inflight.wait(self._refresh(key, load))
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """Drop one entry, or every entry when no key is given."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def _refresh(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        # One load per key at a time, whether foreground or background
+        task, _ = self._inflight.start(key, lambda: self._load(key, load), on_done=self._finish)
+        return task
+
+    def _finish(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and task.exception() is not None:
+            # Background refreshes have no caller: keep serving the stale entry
+            metrics.incr(f"{self.name}.refresh_errors")
+            print(f"{self.name} refresh failed: {task.exception()}")
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> tuple[Any, str]:
+        value = await load()
+        etag = make_etag(value)
+        self._entries[key] = (time.monotonic(), value, etag)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value, etag
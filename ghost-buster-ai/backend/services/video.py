@@ -1,17 +1,98 @@
 # backend/services/video.py
 from __future__ import annotations
 import os
+import time
+import hmac
 import asyncio
+import hashlib
 import httpx
+from collections import OrderedDict
 from typing import Optional
+from services import metrics
+from services.inflight import Inflight
+from services.job_store import get_job_store
+from services.video_poller import VideoStatusPoller
 
 HEYGEN_API_BASE = "https://api.heygen.com"
 
+# Avatar and voice used when the catalog has no better match for the language
+DEFAULT_AVATAR_ID = "Abigail_expressive_2024112501"
+DEFAULT_VOICE_ID = "513b14b431b64a578c467c480dd0a9c3"
+LANGUAGE_NAMES = {"en": "english", "fr": "french", "es": "spanish", "de": "german"}
 
-async def generate_avatar_video(email_content: str, language: str = "en") -> tuple[Optional[str], Optional[str]]:
+# HeyGen webhook events we act on
+WEBHOOK_SUCCESS = "avatar_video.success"
+WEBHOOK_FAIL = "avatar_video.fail"
+
+# App-lifetime pooled client and status poller, created from the FastAPI lifespan hook
+_client: Optional[httpx.AsyncClient] = None
+_poller: Optional[VideoStatusPoller] = None
+
+# Render key -> (expires_at, video_url) for finished renders, and key -> running render
+_renders: OrderedDict[str, tuple[float, str]] = OrderedDict()
+_renders_inflight = Inflight()
+# Running render -> jobs (callback_ids) waiting on it, and its HeyGen video_id once started
+_render_jobs: dict[str, set[str]] = {}
+_render_video_ids: dict[str, str] = {}
+
+# Avatar/voice catalog, loaded at startup and refreshed in the background
+_avatars: list[dict] = []
+_voices_by_language: dict[str, str] = {}
+_catalog_task: Optional[asyncio.Task] = None
+
+
+def _api_base() -> str:
+    # Overridable so a local fake HeyGen server can stand in during testing
+    return os.getenv("HEYGEN_API_BASE", HEYGEN_API_BASE).rstrip("/")
+
+
+def init_client() -> httpx.AsyncClient:
+    """Create the shared HeyGen client and start the status poller and catalog refresh."""
+    global _client, _poller, _catalog_task
+
+    if _client is None:
+        pool_size = int(os.getenv("HEYGEN_POOL_SIZE", "10"))
+        _client = httpx.AsyncClient(
+            timeout=60.0,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+        )
+    if _poller is None:
+        _poller = VideoStatusPoller(_fetch_video_status)
+        _poller.start()
+    if _catalog_task is None and os.getenv("HEYGEN_API_KEY"):
+        _catalog_task = asyncio.create_task(_refresh_catalog_forever())
+    return _client
+
+
+async def close_client() -> None:
+    global _client, _poller, _catalog_task
+
+    if _catalog_task is not None:
+        _catalog_task.cancel()
+        _catalog_task = None
+    if _poller is not None:
+        await _poller.stop()
+        _poller = None
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    # Lazily initialise when used outside the app lifespan (CLI)
+    return _client or init_client()
+
+
+def get_poller() -> VideoStatusPoller:
+    _get_client()
+    return _poller
+
+
+async def generate_avatar_video(email_content: str, language: str = "en", callback_id: Optional[str] = None) -> tuple[Optional[str], Optional[str]]:
     """
     Generate AI avatar video using HeyGen API.
     The avatar reads the email content aloud.
+    `callback_id` is echoed back in HeyGen's webhook so the job can be found.
     Returns (video_url, error_message) tuple.
     """
     api_key = os.getenv("HEYGEN_API_KEY")
@@ -19,11 +100,9 @@ async def generate_avatar_video(email_content: str, language: str = "en") -> tup
     if not api_key:
         return None, "HEYGEN_API_KEY environment variable not configured"
 
-    # Use configured avatar and voice
-    avatar_config = {
-        "avatar_id": "Abigail_expressive_2024112501",
-        "voice_id": "513b14b431b64a578c467c480dd0a9c3"
-    }
+    # Configured avatar, voice picked from the cached catalog for the email language
+    _get_client()
+    avatar_config = _get_avatar_config(language)
 
     headers = {
         "X-Api-Key": api_key,
@@ -57,34 +136,100 @@ async def generate_avatar_video(email_content: str, language: str = "en") -> tup
         },
         "aspect_ratio": "16:9"
     }
+    if callback_id:
+        payload["callback_id"] = callback_id
+
+    # Identical script/avatar/voice/size renders the same video: reuse it
+    key = _render_key(script, avatar_config["avatar_id"], avatar_config["voice_id"], payload["dimension"])
+    cached = _renders.get(key)
+    if cached and cached[0] > time.time():
+        metrics.incr("heygen.render_cache_hits")
+        return cached[1], None
+
+    task, started = _renders_inflight.start(
+        key, lambda: _render(key, payload, headers), on_done=lambda t: _end_render(key)
+    )
+    if started:
+        # The render hasn't run yet: nothing can miss this registration
+        metrics.incr("heygen.render_cache_misses")
+        _render_jobs[key] = set()
+    else:
+        metrics.incr("heygen.render_coalesced")
+    if callback_id:
+        await _join_render(key, callback_id)
+
+    return await _renders_inflight.wait(task)
 
-    try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            # Start video generation
-            response = await client.post(
-                f"{HEYGEN_API_BASE}/v2/video/generate",
-                json=payload,
-                headers=headers
-            )
 
-            if response.status_code != 200:
-                error_msg = f"HeyGen API error: {response.status_code} - {response.text}"
-                print(error_msg)
-                return None, error_msg
+def _end_render(key: str) -> None:
+    _render_jobs.pop(key, None)
+    _render_video_ids.pop(key, None)
+
+
+async def _join_render(key: str, job_id: str) -> None:
+    """
+    Register a job as waiting on a render. Jobs are tagged with the render's
+    video_id so the webhook, on whichever worker receives it, finishes all of
+    them and not only the job whose callback_id HeyGen echoes back.
+    """
+    _render_jobs[key].add(job_id)
+    video_id = _render_video_ids.get(key)
+    if video_id:
+        await _tag_jobs([job_id], video_id)
+
+
+async def _tag_jobs(job_ids: list[str], video_id: str) -> None:
+    store = get_job_store()
+    for job_id in job_ids:
+        try:
+            await store.update(job_id, video_id=video_id)
+        except Exception as e:
+            print(f"Could not record video {video_id} on job {job_id}: {e}")
 
-            data = response.json()
-            video_id = data.get("data", {}).get("video_id")
 
-            if not video_id:
-                error_msg = f"No video_id in HeyGen response: {data}"
-                print(error_msg)
-                return None, error_msg
+def _render_key(script: str, avatar_id: str, voice_id: str, dimension: dict) -> str:
+    raw = "\x1f".join([script, avatar_id, voice_id, str(dimension["width"]), str(dimension["height"])])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
-            print(f"HeyGen video generation started: {video_id}")
 
-            # Poll for completion (max 5 minutes)
-            video_url, error = await _poll_video_status(client, video_id, headers)
-            return video_url, error
+async def _render(key: str, payload: dict, headers: dict) -> tuple[Optional[str], Optional[str]]:
+    """Start one HeyGen render, wait for it and cache the URL on success."""
+    try:
+        # Start video generation
+        response = await _get_client().post(
+            f"{_api_base()}/v2/video/generate",
+            json=payload,
+            headers=headers
+        )
+
+        if response.status_code != 200:
+            error_msg = f"HeyGen API error: {response.status_code} - {response.text}"
+            print(error_msg)
+            return None, error_msg
+
+        data = response.json()
+        video_id = data.get("data", {}).get("video_id")
+
+        if not video_id:
+            error_msg = f"No video_id in HeyGen response: {data}"
+            print(error_msg)
+            return None, error_msg
+
+        print(f"HeyGen video generation started: {video_id}")
+        _render_video_ids[key] = video_id
+        await _tag_jobs(list(_render_jobs.get(key, ())), video_id)
+
+        # The shared poller resolves this once the render completes, fails or times out
+        video_url, error = await get_poller().track(video_id)
+
+        if video_url:
+            # HeyGen URLs expire after 7 days; stop reusing them well before that
+            ttl = float(os.getenv("HEYGEN_VIDEO_URL_TTL", str(6 * 24 * 3600)))
+            _renders[key] = (time.time() + ttl, video_url)
+            _renders.move_to_end(key)
+            while len(_renders) > int(os.getenv("HEYGEN_RENDER_CACHE_SIZE", "1000")):
+                _renders.popitem(last=False)
+        return video_url, error
 
     except Exception as e:
         error_msg = f"Error generating HeyGen video: {e}"
@@ -92,57 +237,57 @@ async def generate_avatar_video(email_content: str, language: str = "en") -> tup
         return None, error_msg
 
 
-async def _poll_video_status(client: httpx.AsyncClient, video_id: str, headers: dict, max_attempts: int = 60) -> tuple[Optional[str], Optional[str]]:
-    """Poll HeyGen API until video is ready. Returns (video_url, error_message) tuple."""
+async def _fetch_video_status(video_id: str) -> dict:
+    """One status request for the poller. Returns HeyGen's `data` object."""
+    response = await _get_client().get(
+        f"{_api_base()}/v1/video_status.get",
+        params={"video_id": video_id},
+        headers={"X-Api-Key": os.getenv("HEYGEN_API_KEY")}
+    )
+    response.raise_for_status()
+    return response.json().get("data", {})
 
-    for attempt in range(max_attempts):
-        try:
-            response = await client.get(
-                f"{HEYGEN_API_BASE}/v1/video_status.get",
-                params={"video_id": video_id},
-                headers=headers
-            )
-
-            if response.status_code != 200:
-                print(f"Status check failed: {response.status_code}")
-                await asyncio.sleep(5)
-                continue
 
-            data = response.json()
-            status = data.get("data", {}).get("status")
-
-            if status == "completed":
-                video_url = data.get("data", {}).get("video_url")
-                print(f"HeyGen video ready: {video_url}")
-                return video_url, None
-            elif status == "failed":
-                error = data.get("data", {}).get("error") or "Unknown HeyGen error"
-                print(f"HeyGen video generation failed: {error}")
-                return None, f"HeyGen generation failed: {error}"
-            elif status in ["processing", "pending"]:
-                print(f"HeyGen video status: {status} (attempt {attempt + 1}/{max_attempts})")
-                await asyncio.sleep(5)  # Wait 5 seconds before next poll
-            else:
-                print(f"Unknown HeyGen status: {status}")
-                await asyncio.sleep(5)
+def verify_webhook_signature(body: bytes, signature: Optional[str]) -> bool:
+    """HeyGen signs the raw body with HMAC-SHA256 using the endpoint secret."""
+    secret = os.getenv("HEYGEN_WEBHOOK_SECRET")
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
 
-        except Exception as e:
-            print(f"Error polling HeyGen status: {e}")
-            await asyncio.sleep(5)
 
-    return None, "HeyGen video generation timed out after 5 minutes"
+def handle_webhook_event(event: dict) -> Optional[dict]:
+    """
+    Apply a HeyGen video event to the local poller.
+    Returns {video_id, callback_id, status, video_url, error}, or None for events we ignore.
+    """
+    event_type = event.get("event_type")
+    data = event.get("event_data", {})
+    if event_type not in (WEBHOOK_SUCCESS, WEBHOOK_FAIL) or not data.get("video_id"):
+        return None
+
+    if event_type == WEBHOOK_SUCCESS:
+        update = {"status": "completed", "video_url": data.get("url"), "error": None}
+    else:
+        update = {"status": "failed", "video_url": None, "error": f"HeyGen generation failed: {data.get('msg') or 'Unknown HeyGen error'}"}
+
+    # Wakes the waiting generate_avatar_video if this worker started the render
+    if _poller is not None:
+        _poller.resolve(data["video_id"], update["video_url"], update["error"])
+
+    return {"video_id": data["video_id"], "callback_id": data.get("callback_id"), **update}
 
 
 async def _fetch_available_voices(api_key: str) -> dict:
     """Fetch available voices from HeyGen API."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{HEYGEN_API_BASE}/v2/voices",
-                headers={"X-Api-Key": api_key}
-            )
-            if response.status_code == 200:
-                return response.json().get("data", {}).get("voices", [])
+        response = await _get_client().get(
+            f"{_api_base()}/v2/voices",
+            headers={"X-Api-Key": api_key}
+        )
+        if response.status_code == 200:
+            return response.json().get("data", {}).get("voices", [])
     except Exception as e:
         print(f"Error fetching voices: {e}")
     return []
@@ -151,70 +296,74 @@ async def _fetch_available_voices(api_key: str) -> dict:
 async def _fetch_available_avatars_list(api_key: str) -> list:
     """Fetch available avatars from HeyGen API."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{HEYGEN_API_BASE}/v2/avatars",
-                headers={"X-Api-Key": api_key}
-            )
-            if response.status_code == 200:
-                return response.json().get("data", {}).get("avatars", [])
+        response = await _get_client().get(
+            f"{_api_base()}/v2/avatars",
+            headers={"X-Api-Key": api_key}
+        )
+        if response.status_code == 200:
+            return response.json().get("data", {}).get("avatars", [])
     except Exception as e:
         print(f"Error fetching avatars: {e}")
     return []
 
 
-async def _get_avatar_config(api_key: str, language: str) -> dict:
-    """Get avatar and voice configuration dynamically from HeyGen."""
+async def refresh_catalog() -> None:
+    """Reload the avatar list and the language -> voice index from HeyGen."""
+    global _avatars, _voices_by_language
 
-    # Fetch available avatars and voices
-    avatars = await _fetch_available_avatars_list(api_key)
-    voices = await _fetch_available_voices(api_key)
+    api_key = os.getenv("HEYGEN_API_KEY")
+    if not api_key:
+        return
 
-    # Get first available avatar
-    avatar_id = None
+    avatars, voices = await asyncio.gather(
+        _fetch_available_avatars_list(api_key),
+        _fetch_available_voices(api_key)
+    )
+
+    # Both fetchers return [] on errors: keep serving the previous catalog
     if avatars:
-        avatar_id = avatars[0].get("avatar_id")
+        _avatars = avatars
+    if voices:
+        # Index every word of the language label ("English", "Spanish (Mexico)"),
+        # first voice wins like the old linear scan
+        index: dict[str, str] = {}
+        for voice in voices:
+            if not voice.get("voice_id"):
+                continue
+            words = voice.get("language", "").lower().replace("(", " ").replace(")", " ").split()
+            for word in words:
+                index.setdefault(word, voice["voice_id"])
+        _voices_by_language = index
 
-    # Find a voice matching the language, or fall back to first available
-    voice_id = None
-    lang_map = {"en": "english", "fr": "french", "es": "spanish", "de": "german"}
-    target_lang = lang_map.get(language, "english")
+    metrics.gauge("heygen.catalog_avatars", len(_avatars))
+    metrics.gauge("heygen.catalog_languages", len(_voices_by_language))
 
-    for voice in voices:
-        voice_lang = voice.get("language", "").lower()
-        if target_lang in voice_lang:
-            voice_id = voice.get("voice_id")
-            break
 
-    # Fallback to first voice if no language match
-    if not voice_id and voices:
-        voice_id = voices[0].get("voice_id")
+async def _refresh_catalog_forever() -> None:
+    ttl = float(os.getenv("HEYGEN_CATALOG_TTL", "3600"))
+
+    while True:
+        try:
+            await refresh_catalog()
+        except Exception as e:
+            print(f"HeyGen catalog refresh failed: {e}")
+        await asyncio.sleep(ttl)
 
-    print(f"Using avatar: {avatar_id}, voice: {voice_id}")
-    return {"avatar_id": avatar_id, "voice_id": voice_id}
+
+def _get_avatar_config(language: str) -> dict:
+    """Avatar and voice for a language, from the cached catalog (no network call)."""
+    voice_id = DEFAULT_VOICE_ID
+    if language != "en" and language in LANGUAGE_NAMES:
+        voice_id = _voices_by_language.get(LANGUAGE_NAMES[language], DEFAULT_VOICE_ID)
+    return {"avatar_id": DEFAULT_AVATAR_ID, "voice_id": voice_id}
 
 
 async def get_available_avatars() -> list[dict]:
-    """Fetch available avatars from HeyGen (for future use)."""
-    api_key = os.getenv("HEYGEN_API_KEY")
+    """Available HeyGen avatars, from the catalog when it is loaded."""
+    if _avatars:
+        return list(_avatars)
 
+    api_key = os.getenv("HEYGEN_API_KEY")
     if not api_key:
         return []
-
-    headers = {"X-Api-Key": api_key}
-
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{HEYGEN_API_BASE}/v2/avatars",
-                headers=headers
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("data", {}).get("avatars", [])
-
-    except Exception as e:
-        print(f"Error fetching avatars: {e}")
-
-    return []
+    return await _fetch_available_avatars_list(api_key)
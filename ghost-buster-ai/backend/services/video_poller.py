@@ -0,0 +1,140 @@
+# backend/services/video_poller.py
+"""
+Single status poller for every outstanding HeyGen render.
+Instead of one sleep/poll loop per video, one background loop checks all
+tracked video_ids on the shared HeyGen client, backing off as a render ages
+and never exceeding a global request rate.
+"""
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+from services import metrics
+
+
+class _Tracked:
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.started_at = time.monotonic()
+        self.next_check = self.started_at
+
+
+class VideoStatusPoller:
+    """
+    `fetch_status(video_id)` performs one status request and returns HeyGen's
+    `data` object (status, video_url, error); it raises on transport errors.
+    """
+
+    def __init__(self, fetch_status: Callable[[str], Awaitable[dict]]):
+        self.fetch_status = fetch_status
+        self.min_interval = float(os.getenv("HEYGEN_POLL_MIN_INTERVAL", "2"))
+        self.max_interval = float(os.getenv("HEYGEN_POLL_MAX_INTERVAL", "30"))
+        self.max_wait = float(os.getenv("HEYGEN_RENDER_TIMEOUT", "600"))
+        self.min_spacing = 1 / float(os.getenv("HEYGEN_STATUS_RPS", "5"))
+        # With webhooks configured, polling is only a slow safety net for missed callbacks
+        self.webhooks = bool(os.getenv("HEYGEN_WEBHOOK_SECRET"))
+        if self.webhooks:
+            self.min_interval = self.max_interval = float(os.getenv("HEYGEN_POLL_FALLBACK_INTERVAL", "60"))
+        self._tracked: dict[str, _Tracked] = {}
+        self._checks: set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._last_request = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for check in list(self._checks):
+            check.cancel()
+
+    def track(self, video_id: str) -> asyncio.Future:
+        """Future resolving to (video_url, error) once the render finishes."""
+        self.start()
+        tracked = self._tracked.get(video_id)
+        if tracked is None:
+            tracked = self._tracked[video_id] = _Tracked(asyncio.get_running_loop().create_future())
+            if self.webhooks:
+                tracked.next_check += self.min_interval
+            metrics.gauge("heygen.renders_in_flight", len(self._tracked))
+            self._wakeup.set()
+        return tracked.future
+
+    def resolve(self, video_id: str, video_url: Optional[str], error: Optional[str]) -> bool:
+        """Finish a tracked render. Returns False when the video isn't tracked here."""
+        tracked = self._tracked.pop(video_id, None)
+        if tracked is None:
+            return False
+        if not tracked.future.done():
+            tracked.future.set_result((video_url, error))
+        metrics.gauge("heygen.renders_in_flight", len(self._tracked))
+        metrics.observe("heygen.render_seconds", time.monotonic() - tracked.started_at)
+        return True
+
+    def _interval(self, tracked: _Tracked) -> float:
+        # Renders take minutes: poll fast at first, then ~10% of the elapsed time
+        age = time.monotonic() - tracked.started_at
+        return min(self.max_interval, max(self.min_interval, age * 0.1))
+
+    async def _throttle(self) -> None:
+        wait = self._last_request + self.min_spacing - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._last_request = time.monotonic()
+
+    async def _run(self) -> None:
+        while True:
+            now = time.monotonic()
+            due = [video_id for video_id, tracked in self._tracked.items() if tracked.next_check <= now]
+
+            if not due:
+                next_check = min((tracked.next_check for tracked in self._tracked.values()), default=None)
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), None if next_check is None else next_check - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            for video_id in due:
+                await self._throttle()
+                tracked = self._tracked.get(video_id)
+                if tracked is None:
+                    continue  # resolved while we waited for a slot
+                tracked.next_check = float("inf")  # check in flight
+                check = asyncio.create_task(self._check(video_id, tracked))
+                self._checks.add(check)
+                check.add_done_callback(self._checks.discard)
+
+    async def _check(self, video_id: str, tracked: _Tracked) -> None:
+        metrics.incr("heygen.status_requests")
+        try:
+            data = await self.fetch_status(video_id)
+            status = data.get("status")
+
+            if status == "completed":
+                print(f"HeyGen video ready: {data.get('video_url')}")
+                self.resolve(video_id, data.get("video_url"), None)
+                return
+            elif status == "failed":
+                error = data.get("error") or "Unknown HeyGen error"
+                print(f"HeyGen video generation failed: {error}")
+                self.resolve(video_id, None, f"HeyGen generation failed: {error}")
+                return
+            elif status not in ["processing", "pending", "waiting"]:
+                print(f"Unknown HeyGen status: {status}")
+
+        except Exception as e:
+            print(f"Error polling HeyGen status: {e}")
+
+        if time.monotonic() - tracked.started_at > self.max_wait:
+            self.resolve(video_id, None, f"HeyGen video generation timed out after {self.max_wait:g}s")
+        elif video_id in self._tracked:
+            tracked.next_check = time.monotonic() + self._interval(tracked)
+            self._wakeup.set()
+
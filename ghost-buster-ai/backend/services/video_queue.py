@@ -0,0 +1,145 @@
+# backend/services/video_queue.py
+"""
+Bounded work queue for /api/generate-video.
+A fixed pool of workers keeps HeyGen under its concurrent-render quota.
+Interactive requests from the UI jump ahead of bulk campaigns, and once the
+queue is full new jobs are refused with a Retry-After estimate instead of
+piling up and failing.
+"""
+import os
+import math
+import time
+import asyncio
+import itertools
+from typing import Optional
+
+from services import metrics
+from services.job_store import get_job_store
+from services.video import generate_avatar_video
+
+# Lane -> priority, lower runs first
+LANES = {"interactive": 0, "bulk": 1}
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"Video queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class VideoQueue:
+    def __init__(self, concurrency: int, max_depth: int, bulk_max_depth: int):
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+        # Bulk stops being admitted first so the UI always has headroom
+        self.bulk_max_depth = min(bulk_max_depth, max_depth)
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._seq = itertools.count()
+        self._depth = {lane: 0 for lane in LANES}
+        self._running = 0
+        # Moving average of job duration, seeded with a typical HeyGen render
+        self._avg_seconds = float(os.getenv("VIDEO_QUEUE_EXPECTED_SECONDS", "120"))
+        self._workers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        self._workers = []
+
+        # Don't leave queued jobs "pending" forever
+        store = get_job_store()
+        while not self._queue.empty():
+            _, _, _, lane, job_id, _, _ = self._queue.get_nowait()
+            self._depth[lane] -= 1
+            await store.update(job_id, status="failed", error="Server shut down before the video started")
+        self._report()
+
+    def depth(self) -> int:
+        return sum(self._depth.values())
+
+    def retry_after(self) -> int:
+        """Seconds until roughly one queued job starts, freeing a slot."""
+        return max(1, math.ceil(self._avg_seconds / self.concurrency))
+
+    async def submit(self, job_id: str, email_content: str, language: str, lane: str = "interactive") -> None:
+        """Record a pending job and queue it, or raise QueueFull."""
+        limit = self.bulk_max_depth if lane == "bulk" else self.max_depth
+        if self.depth() >= limit:
+            metrics.incr(f"video_queue.rejected.{lane}")
+            raise QueueFull(self.retry_after())
+
+        self.start()
+        # Reserve the slot before awaiting so concurrent submits can't overshoot
+        self._depth[lane] += 1
+        try:
+            await get_job_store().create(job_id, status="pending")
+        except Exception:
+            self._depth[lane] -= 1
+            raise
+
+        self._queue.put_nowait((LANES[lane], next(self._seq), time.monotonic(), lane, job_id, email_content, language))
+        self._report()
+
+    def _report(self) -> None:
+        metrics.gauge("video_queue.depth", self.depth())
+        for lane, depth in self._depth.items():
+            metrics.gauge(f"video_queue.depth.{lane}", depth)
+        metrics.gauge("video_queue.running", self._running)
+
+    async def _worker(self) -> None:
+        while True:
+            _, _, enqueued_at, lane, job_id, email_content, language = await self._queue.get()
+            self._depth[lane] -= 1
+            self._running += 1
+            self._report()
+            metrics.observe(f"video_queue.wait_seconds.{lane}", time.monotonic() - enqueued_at)
+
+            started_at = time.monotonic()
+            try:
+                await _run_job(job_id, email_content, language)
+            finally:
+                self._running -= 1
+                self._avg_seconds = 0.8 * self._avg_seconds + 0.2 * (time.monotonic() - started_at)
+                self._report()
+
+
+async def _run_job(job_id: str, email_content: str, language: str) -> None:
+    store = get_job_store()
+    # The job may have been failed (stall sweeper, shutdown) or removed while queued
+    job = await store.get(job_id)
+    if job is None or job["status"] != "pending":
+        metrics.incr("video_queue.skipped")
+        print(f"Video job {job_id} skipped: no longer pending")
+        return
+    await store.update(job_id, status="processing")
+
+    try:
+        video_url, error = await generate_avatar_video(email_content, language, callback_id=job_id)
+
+        if video_url:
+            await store.update(job_id, status="completed", video_url=video_url)
+        else:
+            await store.update(job_id, status="failed", error=error or "Video generation failed")
+
+    except Exception as e:
+        await store.update(job_id, status="failed", error=str(e))
+
+
+_queue: Optional[VideoQueue] = None
+
+
+def get_video_queue() -> VideoQueue:
+    global _queue
+
+    if _queue is None:
+        max_depth = int(os.getenv("VIDEO_QUEUE_MAX_DEPTH", "200"))
+        _queue = VideoQueue(
+            concurrency=int(os.getenv("VIDEO_CONCURRENCY", "3")),
+            max_depth=max_depth,
+            bulk_max_depth=int(os.getenv("VIDEO_QUEUE_BULK_MAX_DEPTH", str(max_depth * 3 // 4)))
+        )
+    return _queue
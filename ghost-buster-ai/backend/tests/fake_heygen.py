@@ -0,0 +1,147 @@
+# backend/tests/fake_heygen.py
+"""
+Fake HeyGen API for tests and local runs, enough for the video flow:
+/v2/video/generate, /v1/video_status.get and signed render webhooks.
+
+    uv run python -m tests.fake_heygen --port 8100 --webhook-url http://localhost:8000/api/webhooks/heygen --secret dev
+    HEYGEN_API_BASE=http://localhost:8100 HEYGEN_API_KEY=fake HEYGEN_WEBHOOK_SECRET=dev uv run uvicorn main:app
+
+Without a webhook, a render reports "processing" for `render_polls` status
+checks and then "completed". With one, renders only finish through the
+signed callback: `finish(video_id)`, or automatically after `finish_after`
+seconds.
+"""
+import hmac
+import json
+import uuid
+import asyncio
+import hashlib
+import argparse
+from typing import Awaitable, Callable, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# (body, signature) -> delivers a webhook to the app under test
+Deliver = Callable[[bytes, str], Awaitable[None]]
+
+
+class FakeHeyGen:
+    def __init__(
+        self,
+        render_polls: int = 2,
+        fail: bool = False,
+        secret: Optional[str] = None,
+        deliver: Optional[Deliver] = None,
+        finish_after: Optional[float] = None
+    ):
+        self.render_polls = render_polls
+        self.fail = fail
+        self.secret = secret
+        self.deliver = deliver
+        self.finish_after = finish_after
+        # video_id -> {"callback_id", "script", "polls"}
+        self.videos: dict[str, dict] = {}
+        self.generate_calls = 0
+        self.status_calls = 0
+        self.app = self._build_app()
+
+    def _build_app(self) -> FastAPI:
+        app = FastAPI(title="Fake HeyGen")
+
+        @app.post("/v2/video/generate")
+        async def generate(request: Request):
+            if not request.headers.get("x-api-key"):
+                return JSONResponse(status_code=401, content={"error": "Missing X-Api-Key"})
+            payload = await request.json()
+            self.generate_calls += 1
+            video_id = uuid.uuid4().hex
+            self.videos[video_id] = {
+                "callback_id": payload.get("callback_id"),
+                "script": payload["video_inputs"][0]["voice"]["input_text"],
+                "polls": 0,
+            }
+            if self.deliver is not None and self.finish_after is not None:
+                asyncio.ensure_future(self._finish_later(video_id))
+            return {"error": None, "data": {"video_id": video_id}}
+
+        @app.get("/v1/video_status.get")
+        async def status(video_id: str):
+            self.status_calls += 1
+            video = self.videos.get(video_id)
+            if video is None:
+                return JSONResponse(status_code=404, content={"error": "Unknown video_id"})
+            video["polls"] += 1
+            # Webhook mode: only finish() completes a render
+            if self.deliver is not None or video["polls"] <= self.render_polls:
+                return {"data": {"status": "processing"}}
+            if self.fail:
+                return {"data": {"status": "failed", "error": "fake render failure"}}
+            return {"data": {"status": "completed", "video_url": self.video_url(video_id)}}
+
+        @app.get("/v2/voices")
+        async def voices():
+            return {"data": {"voices": [{"voice_id": "fake-fr", "language": "French"}]}}
+
+        @app.get("/v2/avatars")
+        async def avatars():
+            return {"data": {"avatars": [{"avatar_id": "fake-avatar", "avatar_name": "Fake"}]}}
+
+        return app
+
+    @staticmethod
+    def video_url(video_id: str) -> str:
+        return f"https://fake-heygen.local/videos/{video_id}.mp4"
+
+    def sign(self, body: bytes) -> str:
+        return hmac.new(self.secret.encode(), body, hashlib.sha256).hexdigest()
+
+    def event(self, video_id: str) -> bytes:
+        video = self.videos[video_id]
+        if self.fail:
+            event = {"event_type": "avatar_video.fail", "event_data": {"video_id": video_id, "msg": "fake render failure", "callback_id": video["callback_id"]}}
+        else:
+            event = {"event_type": "avatar_video.success", "event_data": {"video_id": video_id, "url": self.video_url(video_id), "callback_id": video["callback_id"]}}
+        return json.dumps(event).encode()
+
+    async def finish(self, video_id: str) -> None:
+        """Deliver the signed webhook for a render."""
+        body = self.event(video_id)
+        await self.deliver(body, self.sign(body))
+
+    async def _finish_later(self, video_id: str) -> None:
+        await asyncio.sleep(self.finish_after)
+        await self.finish(video_id)
+
+
+def main():
+    import httpx
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake HeyGen API")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--render-polls", type=int, default=2, help="Status checks before a render completes (no webhook)")
+    parser.add_argument("--render-seconds", type=float, default=5, help="Delay before the webhook is sent")
+    parser.add_argument("--webhook-url", help="Send signed render webhooks here instead of completing on poll")
+    parser.add_argument("--secret", default="dev", help="Webhook signing secret (HEYGEN_WEBHOOK_SECRET)")
+    parser.add_argument("--fail", action="store_true", help="Fail every render")
+    args = parser.parse_args()
+
+    deliver = None
+    if args.webhook_url:
+        async def deliver(body: bytes, signature: str) -> None:
+            async with httpx.AsyncClient() as client:
+                await client.post(args.webhook_url, content=body, headers={"signature": signature, "Content-Type": "application/json"})
+
+    fake = FakeHeyGen(
+        render_polls=args.render_polls,
+        fail=args.fail,
+        secret=args.secret,
+        deliver=deliver,
+        finish_after=args.render_seconds
+    )
+    uvicorn.run(fake.app, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# backend/tests/test_chat_sessions.py
+from services.chat_sessions import CACHE_MIN_TOKENS, ChatSession
+
+GREETING = {"role": "assistant", "content": "Hi! I'm your career coach. Ask me anything about this analysis."}
+
+
+def cached(message: dict) -> bool:
+    return isinstance(message["content"], list) and "cache_control" in message["content"][-1]
+
+
+def test_greeting_is_dropped_without_a_summary():
+    session = ChatSession("system prompt", [GREETING, {"role": "user", "content": "Why was I rejected?"}])
+    older, recent = session.window(3000)
+
+    assert older == []
+    assert [m["role"] for m in recent] == ["user"]
+
+
+def test_turns_beyond_the_budget_are_summarized():
+    history = [GREETING]
+    for i in range(4):
+        history += [{"role": "user", "content": f"question {i} " * 200}, {"role": "assistant", "content": f"answer {i} " * 200}]
+    history.append({"role": "user", "content": "last question"})
+    session = ChatSession("system prompt", history)
+    older, recent = session.window(1000)
+
+    assert older[0] == GREETING
+    assert recent[0]["role"] == "user"
+    assert len(older) + len(recent) == len(history)
+
+
+def test_short_chats_get_no_cache_breakpoint():
+    session = ChatSession("system prompt", [
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": "hi"},
+        {"role": "user", "content": "question"},
+    ])
+    request = session.request(3000)
+
+    assert not any(cached(m) for m in request["messages"])
+    assert "cache_control" not in request["system"][0]
+
+
+def test_long_chats_cache_everything_before_the_new_message():
+    session = ChatSession("system prompt", [
+        {"role": "user", "content": "hello"},
+        {"role": "assistant", "content": "x" * 4 * CACHE_MIN_TOKENS},
+        {"role": "user", "content": "question"},
+    ])
+    messages = session.request(3000)["messages"]
+
+    assert [cached(m) for m in messages] == [False, True, False]
@@ -0,0 +1,38 @@
+# backend/tests/test_job_store.py
+import asyncio
+
+import pytest
+
+from services.job_store import STALLED_ERROR, MemoryJobStore, SQLiteJobStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryJobStore(max_entries=100)
+    return SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+
+
+def test_queued_jobs_outlive_the_render_timeout(store):
+    async def run():
+        await store.create("queued")
+        await store.create("rendering", status="processing")
+        await asyncio.sleep(0.05)
+        failed = await store.fail_stalled(processing_after=0.01, pending_after=60)
+        return failed, await store.get("queued"), await store.get("rendering")
+
+    failed, queued, rendering = asyncio.run(run())
+
+    assert failed == 1
+    assert queued["status"] == "pending"
+    assert (rendering["status"], rendering["error"]) == ("failed", STALLED_ERROR)
+
+
+def test_lost_queued_jobs_fail_eventually(store):
+    async def run():
+        await store.create("queued")
+        await asyncio.sleep(0.05)
+        await store.fail_stalled(processing_after=60, pending_after=0.01)
+        return await store.get("queued")
+
+    assert asyncio.run(run())["status"] == "failed"
@@ -0,0 +1,71 @@
+# backend/tests/test_replica_sync.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services import hrflow
+from services.replica import Replica
+
+
+class FakeStoring:
+    """HRFlow storing.list over in-memory documents, sorted like the API."""
+
+    def __init__(self, documents: list[dict]):
+        self.documents = documents
+
+    def list(self, page: int, limit: int, sort_by: str, order_by: str, **params) -> dict:
+        ordered = sorted(self.documents, key=lambda d: d.get(sort_by) or "", reverse=order_by == "desc")
+        return {
+            "code": 200,
+            "data": ordered[(page - 1) * limit:page * limit],
+            "meta": {"maxPage": -(-len(ordered) // limit)},
+        }
+
+
+@pytest.fixture
+def replica(monkeypatch, tmp_path):
+    monkeypatch.setenv("HRFLOW_SOURCE_KEY", "source")
+    monkeypatch.setenv("HRFLOW_BOARD_KEY", "board")
+    monkeypatch.setenv("HRFLOW_REPLICA_PAGE_SIZE", "2")
+    store = Replica(str(tmp_path / "replica.sqlite3"))
+    monkeypatch.setattr(hrflow, "get_replica", lambda: store)
+    return store
+
+
+def use_documents(monkeypatch, profiles: list[dict]) -> None:
+    client = SimpleNamespace(
+        profile=SimpleNamespace(storing=FakeStoring(profiles)),
+        job=SimpleNamespace(storing=FakeStoring([]))
+    )
+    monkeypatch.setattr(hrflow, "_get_client", lambda: client)
+
+
+def test_incremental_sync_picks_up_edits(monkeypatch, replica):
+    profiles = [{"key": f"p{i}", "updated_at": f"2026-01-0{i + 1}"} for i in range(5)]
+    use_documents(monkeypatch, profiles)
+
+    assert asyncio.run(hrflow.sync_replica())["profiles"] == 5
+    profiles[0]["updated_at"] = "2026-02-01"
+    synced = asyncio.run(hrflow.sync_replica())["profiles"]
+
+    # The edit, plus the document at the old mark (re-read on purpose)
+    assert synced == 2
+    assert asyncio.run(replica.get("profile", "source", "p0"))["updated_at"] == "2026-02-01"
+
+
+def test_sync_ignores_other_edit_dates(monkeypatch, replica):
+    # date_edition running ahead of updated_at must not move the high-water mark
+    profiles = [
+        {"key": "p0", "updated_at": "2026-01-05", "date_edition": "2026-03-01"},
+        {"key": "p1", "updated_at": "2026-01-04", "date_edition": "2026-01-04"},
+        {"key": "p2", "updated_at": "2026-01-03", "date_edition": "2026-01-03"},
+    ]
+    use_documents(monkeypatch, profiles)
+    asyncio.run(hrflow.sync_replica())
+
+    profiles[2].update(updated_at="2026-02-01", name="edited")
+    asyncio.run(hrflow.sync_replica())
+
+    assert asyncio.run(replica.high_water("profile", "source")) == "2026-02-01"
+    assert asyncio.run(replica.get("profile", "source", "p2"))["name"] == "edited"
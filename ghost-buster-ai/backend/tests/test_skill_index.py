@@ -0,0 +1,41 @@
+# backend/tests/test_skill_index.py
+import pytest
+
+from services.skill_index import SKILL_ALIASES, SkillIndex
+
+index = SkillIndex(SKILL_ALIASES)
+
+
+@pytest.mark.parametrize("name, canonical", [
+    ("Python 3", "python"),
+    ("py", "python"),
+    ("Python programming", "python"),
+    ("ReactJS", "react"),
+    ("k8s", "kubernetes"),
+    ("Team Work", "teamwork"),
+    ("problem-solving", "problem solving"),
+    ("Postgre SQL", "postgresql"),  # spaces dropped
+    ("Type Script", "typescript"),
+    ("Javascrpt", "javascript"),  # typo inside a word
+    ("Kubernets", "kubernetes"),
+])
+def test_same_skill_resolves_to_one_id(name, canonical):
+    assert index.canonical(name) == canonical
+
+
+@pytest.mark.parametrize("name, other", [
+    ("Product management", "Project management"),
+    ("Product manager", "Project management"),
+    ("Excel VBA", "Microsoft Excel"),
+    ("Machine learning ops", "Machine learning"),
+    ("Java", "JavaScript"),
+    ("React Native", "React"),
+])
+def test_near_misses_stay_distinct(name, other):
+    assert not index.same_skill(name, other)
+
+
+def test_near_misses_keep_their_own_name():
+    assert index.canonical("Product management") == "product management"
+    assert index.canonical("Excel VBA") == "excel vba"
+    assert index.canonical("Machine learning ops") == "machine learning ops"
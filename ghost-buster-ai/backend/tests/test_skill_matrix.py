@@ -0,0 +1,43 @@
+# backend/tests/test_skill_matrix.py
+import pytest
+
+from services.skill_matrix import JobRequirements, level_scale, skill_level
+
+
+def levels(values: list) -> list[int]:
+    skills = [{"name": f"s{i}", "value": value} for i, value in enumerate(values)]
+    scale = level_scale(skills)
+    return [skill_level(skill, default=-1, scale=scale) for skill in skills]
+
+
+@pytest.mark.parametrize("values, expected", [
+    ([1, 2, 3, 4, 5], [20, 40, 60, 80, 100]),  # ratings
+    ([1, 1], [20, 20]),
+    (["1", "3"], [20, 60]),
+    ([0.25, 0.5, 1.0], [25, 50, 100]),  # ratios
+    (["0.8", "0.4"], [80, 40]),
+    ([6, 40, 100], [6, 40, 100]),  # percentages
+    ([2, 60], [2, 60]),
+    (["3%", "80%"], [3, 80]),
+])
+def test_levels_follow_the_documents_scale(values, expected):
+    assert levels(values) == expected
+
+
+def test_levels_are_monotonic_within_a_document():
+    for values in ([1, 2, 3, 4, 5], [0.1, 0.5, 0.9, 1.0], [1, 5, 6, 50, 100]):
+        result = levels(values)
+        assert result == sorted(result)
+
+
+def test_words_and_missing_values():
+    assert levels(["expert", None, "unknown", True]) == [90, -1, -1, -1]
+
+
+def test_lowest_rating_is_a_gap():
+    job = JobRequirements({"skills": [{"name": "Python", "value": 4}, {"name": "SQL", "value": 2}]})
+    profile = {"skills": [{"name": "Python", "value": 1}, {"name": "SQL", "value": 5}]}
+    result = job.analyze([profile])[0]
+
+    assert [(g["name"], g["candidateLevel"], g["requiredLevel"]) for g in result["gaps"]] == [("Python", 20, 80)]
+    assert result["strengths"][0]["name"] == "SQL"
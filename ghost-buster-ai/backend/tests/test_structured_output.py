@@ -0,0 +1,86 @@
+# backend/tests/test_structured_output.py
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from services import hrflow, llm, metrics
+from services.llm_cache import MemoryCache
+
+VALID = {"recommendations": [{
+    "type": "hardskill",
+    "skill": "Go",
+    "title": "Learn Go",
+    "description": "Build a small service in Go.",
+    "courses": [{"name": "Go basics", "platform": "Coursera", "url": "https://example.com/go"}],
+}]}
+MISSING_DESCRIPTION = {"recommendations": [{"type": "hardskill", "skill": "Go", "title": "Learn Go", "courses": []}]}
+
+
+def tool_response(tool_input: dict, input_tokens: int = 100, output_tokens: int = 50):
+    block = SimpleNamespace(type="tool_use", id="toolu_1", name=hrflow.RECOMMENDATIONS_TOOL["name"], input=tool_input)
+    return SimpleNamespace(
+        content=[block],
+        stop_reason="tool_use",
+        usage=SimpleNamespace(input_tokens=input_tokens, output_tokens=output_tokens)
+    )
+
+
+@pytest.fixture
+def responses(monkeypatch):
+    """Queue of model responses; every request is recorded in `.calls`."""
+    queue = SimpleNamespace(items=[], calls=[])
+
+    async def create_message(purpose: str, **params):
+        queue.calls.append(params)
+        return queue.items.pop(0)
+
+    monkeypatch.setattr(llm, "create_message", create_message)
+    monkeypatch.setattr(llm, "get_cache", lambda: None)
+    return queue
+
+
+def counter(name: str) -> float:
+    return metrics.snapshot()["counters"].get(f"llm.recommendations.{name}", 0)
+
+
+def recommend(job_title: str) -> list[dict]:
+    return asyncio.run(hrflow.generate_recommendations([{"name": "Go"}], [], job_title))
+
+
+def test_valid_tool_call(responses):
+    responses.items = [tool_response(VALID)]
+    assert recommend("Backend") == VALID["recommendations"]
+    assert responses.calls[0]["tool_choice"] == {"type": "tool", "name": "submit_recommendations"}
+
+
+def test_invalid_output_is_repaired_once(responses):
+    failed, wasted_in, wasted_out = counter("failed_calls"), counter("wasted_input_tokens"), counter("wasted_output_tokens")
+    responses.items = [tool_response(MISSING_DESCRIPTION, 120, 80), tool_response(VALID)]
+
+    assert recommend("Backend repair") == VALID["recommendations"]
+    # The repair turn carries the bad answer and the validation error
+    assistant, error = responses.calls[1]["messages"][-2:]
+    assert assistant["content"][0]["input"] == MISSING_DESCRIPTION
+    assert error["content"][0]["is_error"] and "description" in error["content"][0]["content"]
+    assert counter("failed_calls") == failed + 1
+    assert counter("wasted_input_tokens") == wasted_in + 120
+    assert counter("wasted_output_tokens") == wasted_out + 80
+
+
+def test_falls_back_when_the_repair_fails(responses):
+    responses.items = [tool_response(MISSING_DESCRIPTION), tool_response({"recommendations": []})]
+    result = recommend("Backend fallback")
+
+    assert len(responses.calls) == 2
+    assert result[0]["courses"] == [] and result[0]["skill"] == "Go"
+
+
+def test_cached_answers_update_the_hit_rate(responses, monkeypatch):
+    store = MemoryCache(max_entries=10, ttl=60)
+    monkeypatch.setattr(llm, "get_cache", lambda: store)
+    responses.items = [tool_response(VALID)]
+
+    assert recommend("Backend cached") == recommend("Backend cached")
+    assert len(responses.calls) == 1
+    assert "llm.recommendations.cache_hit_rate" in metrics.snapshot()["gauges"]
@@ -0,0 +1,194 @@
+# backend/tests/test_video_webhooks.py
+# Run from backend/: uv run --with pytest python -m pytest tests
+import json
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from routers import webhooks
+from services import video
+from services.job_store import get_job_store
+from tests.fake_heygen import FakeHeyGen
+
+SECRET = "test-secret"
+API_BASE = "http://fake-heygen.test"
+
+
+@pytest.fixture(autouse=True)
+def heygen_env(monkeypatch):
+    monkeypatch.setenv("HEYGEN_API_KEY", "fake-key")
+    monkeypatch.setenv("HEYGEN_API_BASE", API_BASE)
+    monkeypatch.setenv("HEYGEN_POLL_MIN_INTERVAL", "0.01")
+    monkeypatch.setenv("HEYGEN_POLL_MAX_INTERVAL", "0.01")
+    monkeypatch.setenv("HEYGEN_STATUS_RPS", "1000")
+    monkeypatch.delenv("HEYGEN_WEBHOOK_SECRET", raising=False)
+    video._renders.clear()
+    yield
+    video._renders.clear()
+
+
+def app_client() -> httpx.AsyncClient:
+    """Client for the backend's webhook route."""
+    app = FastAPI()
+    app.include_router(webhooks.router)
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://backend.test")
+
+
+async def start_video(fake: FakeHeyGen) -> None:
+    # Point the shared HeyGen client at the fake server before the poller starts
+    video._client = httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app))
+    video.init_client()
+
+
+async def post_webhook(client: httpx.AsyncClient, body: bytes, signature: str) -> httpx.Response:
+    return await client.post("/api/webhooks/heygen", content=body, headers={"signature": signature})
+
+
+def test_signature_verification(monkeypatch):
+    body = b'{"event_type": "avatar_video.success"}'
+    fake = FakeHeyGen(secret=SECRET)
+
+    assert not video.verify_webhook_signature(body, fake.sign(body))  # no secret configured
+    monkeypatch.setenv("HEYGEN_WEBHOOK_SECRET", SECRET)
+    assert video.verify_webhook_signature(body, fake.sign(body))
+    assert not video.verify_webhook_signature(body + b" ", fake.sign(body))
+    assert not video.verify_webhook_signature(body, None)
+
+
+def test_webhook_updates_job_store(monkeypatch):
+    monkeypatch.setenv("HEYGEN_WEBHOOK_SECRET", SECRET)
+    fake = FakeHeyGen(secret=SECRET)
+    fake.videos["v1"] = {"callback_id": "job-ok", "script": "", "polls": 0}
+
+    async def run():
+        store = get_job_store()
+        await store.create("job-ok")
+        async with app_client() as client:
+            body = fake.event("v1")
+            rejected = await post_webhook(client, body, "0" * 64)
+            assert rejected.status_code == 401
+            assert (await store.get("job-ok"))["status"] == "pending"
+
+            response = await post_webhook(client, body, fake.sign(body))
+            assert response.status_code == 200
+        return await store.get("job-ok")
+
+    job = asyncio.run(run())
+    assert job["status"] == "completed"
+    assert job["video_url"] == FakeHeyGen.video_url("v1")
+
+
+def test_failed_render_webhook(monkeypatch):
+    monkeypatch.setenv("HEYGEN_WEBHOOK_SECRET", SECRET)
+    fake = FakeHeyGen(secret=SECRET, fail=True)
+    fake.videos["v2"] = {"callback_id": "job-fail", "script": "", "polls": 0}
+
+    async def run():
+        store = get_job_store()
+        await store.create("job-fail")
+        async with app_client() as client:
+            body = fake.event("v2")
+            await post_webhook(client, body, fake.sign(body))
+        return await store.get("job-fail")
+
+    job = asyncio.run(run())
+    assert job["status"] == "failed"
+    assert "fake render failure" in job["error"]
+
+
+def test_poller_completes_render_from_fake_server():
+    fake = FakeHeyGen(render_polls=3)
+
+    async def run():
+        await start_video(fake)
+        try:
+            return await asyncio.wait_for(video.generate_avatar_video("Hello from the poller test"), 5)
+        finally:
+            await video.close_client()
+
+    video_url, error = asyncio.run(run())
+    assert error is None
+    assert video_url == FakeHeyGen.video_url(next(iter(fake.videos)))
+    assert fake.generate_calls == 1
+    assert fake.status_calls == 4  # three "processing", then "completed"
+
+
+def test_poller_reports_failed_render():
+    fake = FakeHeyGen(render_polls=0, fail=True)
+
+    async def run():
+        await start_video(fake)
+        try:
+            return await asyncio.wait_for(video.generate_avatar_video("Hello from the failure test"), 5)
+        finally:
+            await video.close_client()
+
+    video_url, error = asyncio.run(run())
+    assert video_url is None
+    assert "fake render failure" in error
+
+
+def test_webhook_finishes_render_without_polling(monkeypatch):
+    # With a secret set the poller only checks every 60s, so completing within
+    # the timeout below means the webhook did it
+    monkeypatch.setenv("HEYGEN_WEBHOOK_SECRET", SECRET)
+
+    async def run():
+        async with app_client() as client:
+            async def deliver(body: bytes, signature: str) -> None:
+                response = await post_webhook(client, body, signature)
+                assert response.status_code == 200
+
+            fake = FakeHeyGen(secret=SECRET, deliver=deliver, finish_after=0.05)
+            await start_video(fake)
+            store = get_job_store()
+            await store.create("job-webhook")
+            try:
+                result = await asyncio.wait_for(
+                    video.generate_avatar_video("Hello from the webhook test", callback_id="job-webhook"),
+                    5
+                )
+            finally:
+                await video.close_client()
+            return fake, result, await store.get("job-webhook")
+
+    fake, (video_url, error), job = asyncio.run(run())
+    video_id = next(iter(fake.videos))
+    assert error is None
+    assert video_url == FakeHeyGen.video_url(video_id)
+    assert json.loads(fake.event(video_id))["event_data"]["callback_id"] == "job-webhook"
+    assert job["status"] == "completed"
+    assert fake.status_calls == 0
+
+
+def test_webhook_finishes_every_job_sharing_a_render(monkeypatch):
+    monkeypatch.setenv("HEYGEN_WEBHOOK_SECRET", SECRET)
+
+    async def run():
+        async with app_client() as client:
+            async def deliver(body: bytes, signature: str) -> None:
+                await post_webhook(client, body, signature)
+
+            fake = FakeHeyGen(secret=SECRET, deliver=deliver, finish_after=0.05)
+            await start_video(fake)
+            store = get_job_store()
+            for job_id in ("job-first", "job-shared"):
+                await store.create(job_id, status="processing")
+            try:
+                # generate_avatar_video leaves the store to its caller, so any
+                # status change below comes from the webhook
+                results = await asyncio.wait_for(asyncio.gather(
+                    video.generate_avatar_video("Same script for both jobs", callback_id="job-first"),
+                    video.generate_avatar_video("Same script for both jobs", callback_id="job-shared")
+                ), 5)
+            finally:
+                await video.close_client()
+            return fake, results, [await store.get(job_id) for job_id in ("job-first", "job-shared")]
+
+    fake, results, jobs = asyncio.run(run())
+    assert fake.generate_calls == 1
+    assert results[0] == results[1]
+    assert [job["status"] for job in jobs] == ["completed", "completed"]
+    assert jobs[1]["video_url"] == results[0][0]
@@ -8,7 +8,7 @@ import { EmailPreview } from './components/EmailPreview';
 import { Recommendations } from './components/Recommendations';
 import { Chat } from './components/Chat';
 import { VideoPlayer } from './components/VideoPlayer';
-import { fetchJobs, fetchProfiles, analyzeCandidate } from './lib/api';
+import { fetchJobs, fetchProfiles, analyzeCandidateStream } from './lib/api';
 import type { Job, Profile, AnalysisResult } from './lib/types';
 
 type Step = 'select' | 'analyzing' | 'results';
@@ -40,6 +40,8 @@ function App() {
   const [result, setResult] = useState<AnalysisResult | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [showChat, setShowChat] = useState(false);
+  // True while the email and recommendations are still streaming in
+  const [streaming, setStreaming] = useState(false);
   const [roastMode, setRoastMode] = useState(false);
 
   // Update URL when selection changes
@@ -94,14 +96,20 @@ function App() {
     setError(null);
 
     try {
-      const analysisResult = await analyzeCandidate(selectedProfile.key, selectedJob.key, roastMode);
-      setResult(analysisResult);
-      setStep('results');
+      // Show the score and skills as soon as they arrive, then fill in the email.
+      // Video and chat wait for the final result: they need the full email and recommendations.
+      setStreaming(true);
+      await analyzeCandidateStream(selectedProfile.key, selectedJob.key, roastMode, (partial) => {
+        setResult(partial);
+        setStep('results');
+      });
       setShowChat(true);
     } catch (err) {
       console.error('Analysis failed:', err);
       setError('Failed to analyze. Please try again.');
       setStep('select');
+    } finally {
+      setStreaming(false);
     }
   };
 
@@ -265,9 +273,10 @@ function App() {
                 {!showChat && (
                   <button
                     onClick={() => setShowChat(true)}
-                    className="flex items-center gap-2 px-6 py-3 bg-gradient-to-r from-indigo-600 to-purple-600 text-white rounded-xl font-medium hover:from-indigo-700 hover:to-purple-700 transition-all shadow-md hover:shadow-lg"
+                    disabled={streaming}
+                    className="flex items-center gap-2 px-6 py-3 bg-gradient-to-r from-indigo-600 to-purple-600 text-white rounded-xl font-medium hover:from-indigo-700 hover:to-purple-700 transition-all shadow-md hover:shadow-lg disabled:opacity-50 disabled:cursor-not-allowed"
                   >
-                    <MessageCircle className="w-5 h-5" />
+                    {streaming ? <Loader2 className="w-5 h-5 animate-spin" /> : <MessageCircle className="w-5 h-5" />}
                     Open Feedback Chat
                   </button>
                 )}
@@ -283,6 +292,7 @@ function App() {
               <VideoPlayer
                 emailContent={result.email}
                 language={result.detectedLanguage}
+                disabled={streaming}
               />
             </div>
 
@@ -30,6 +30,9 @@ export function Chat({ context, onClose }: ChatProps) {
   ]);
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  // Server-side session: after the first turn only new messages are sent
+  const sessionIdRef = useRef<string | null>(null);
+  const syncedCountRef = useRef(0);
 
   // Voice transcript handler
   const handleTranscript = useCallback((text: string, isFinal: boolean) => {
@@ -77,24 +80,36 @@ export function Chat({ context, onClose }: ChatProps) {
     setIsLoading(true);
 
     try {
-      const response = await fetch('/api/chat', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({
-          messages: [...messages, userMessage].map((m) => ({
-            role: m.role,
-            content: m.content,
-          })),
-          context,
-        }),
-      });
+      const history = [...messages, userMessage].map((m) => ({
+        role: m.role,
+        content: m.content,
+      }));
+      const send = (sessionId: string | null) =>
+        fetch('/api/chat', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify(
+            sessionId
+              ? { session_id: sessionId, messages: history.slice(syncedCountRef.current) }
+              : { messages: history, context }
+          ),
+        });
+
+      let response = await send(sessionIdRef.current);
+      if (response.status === 404 && sessionIdRef.current) {
+        // Session expired on the server: start a new one with the full history
+        sessionIdRef.current = null;
+        response = await send(null);
+      }
 
       if (!response.ok) throw new Error('Chat request failed');
+      sessionIdRef.current = response.headers.get('X-Chat-Session-Id');
 
       const reader = response.body?.getReader();
       if (!reader) throw new Error('No reader available');
 
       const decoder = new TextDecoder();
+      let pending = '';
       let assistantContent = '';
       const assistantId = `assistant-${Date.now()}`;
 
@@ -108,9 +123,10 @@ export function Chat({ context, onClose }: ChatProps) {
         const { done, value } = await reader.read();
         if (done) break;
 
-        const chunk = decoder.decode(value);
-        // Parse the streaming format: 0:"text"\n
-        const lines = chunk.split('\n');
+        // Parse the streaming format: 0:"text"\n - a line can span reads
+        pending += decoder.decode(value, { stream: true });
+        const lines = pending.split('\n');
+        pending = lines.pop() ?? '';
         for (const line of lines) {
           if (line.startsWith('0:')) {
             try {
@@ -127,8 +143,12 @@ export function Chat({ context, onClose }: ChatProps) {
           }
         }
       }
+      // The server stored this turn and the reply
+      syncedCountRef.current = history.length + 1;
     } catch (error) {
       console.error('Chat error:', error);
+      // Don't guess what the server kept: the next turn opens a fresh session
+      sessionIdRef.current = null;
       setMessages((prev) => [
         ...prev,
         {
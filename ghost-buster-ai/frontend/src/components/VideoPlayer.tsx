@@ -5,9 +5,10 @@ import { startVideoGeneration, getVideoStatus, type VideoJob } from '../lib/api'
 interface VideoPlayerProps {
   emailContent: string;
   language: string;
+  disabled?: boolean;
 }
 
-export function VideoPlayer({ emailContent, language }: VideoPlayerProps) {
+export function VideoPlayer({ emailContent, language, disabled }: VideoPlayerProps) {
   const [status, setStatus] = useState<'idle' | 'generating' | 'ready' | 'error'>('idle');
   const [videoUrl, setVideoUrl] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
@@ -76,13 +77,14 @@ export function VideoPlayer({ emailContent, language }: VideoPlayerProps) {
           </p>
           <button
             onClick={generateVideo}
-            className="flex items-center gap-2 mx-auto px-6 py-3 bg-blue-600 hover:bg-blue-700 rounded-lg font-medium transition-colors"
+            disabled={disabled}
+            className="flex items-center gap-2 mx-auto px-6 py-3 bg-blue-600 hover:bg-blue-700 rounded-lg font-medium transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
           >
             <Play className="w-4 h-4" />
             Generate Avatar Video
           </button>
           <p className="text-xs text-slate-500 mt-3">
-            Takes 2-3 minutes to generate
+            {disabled ? 'Available once the email is written' : 'Takes 2-3 minutes to generate'}
           </p>
         </div>
       )}
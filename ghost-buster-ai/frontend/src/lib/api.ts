@@ -43,6 +43,72 @@ export async function analyzeCandidate(
   return response.json();
 }
 
+/**
+ * Streaming variant of analyzeCandidate: `onUpdate` receives the result as it
+ * fills in (score and skills first, then the email text and recommendations).
+ */
+export async function analyzeCandidateStream(
+  profileKey: string,
+  jobKey: string,
+  roastMode: boolean,
+  onUpdate: (partial: AnalysisResult) => void
+): Promise<AnalysisResult> {
+  const response = await fetch(`${API_BASE}/analyze/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({
+      profile_key: profileKey,
+      job_key: jobKey,
+      roast_mode: roastMode,
+    }),
+  });
+
+  const reader = response.body?.getReader();
+  if (!response.ok || !reader) {
+    throw new Error('Failed to analyze candidate');
+  }
+
+  const decoder = new TextDecoder();
+  let pending = '';
+  let partial: AnalysisResult | null = null;
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+
+    pending += decoder.decode(value, { stream: true });
+    const lines = pending.split('\n');
+    pending = lines.pop() ?? '';
+
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      const event = JSON.parse(line);
+
+      if (event.type === 'analysis') {
+        partial = event.result;
+      } else if (event.type === 'email_delta' && partial) {
+        partial = { ...partial, email: partial.email + event.text };
+      } else if (event.type === 'recommendations' && partial) {
+        partial = {
+          ...partial,
+          recommendations: event.recommendations,
+          chatContext: { ...partial.chatContext, recommendations: event.recommendations },
+        };
+      } else if (event.type === 'result') {
+        onUpdate(event.result);
+        return event.result;
+      } else if (event.type === 'error') {
+        throw new Error(event.error);
+      } else {
+        continue; // heartbeat
+      }
+      if (partial) onUpdate(partial);
+    }
+  }
+
+  throw new Error('Analysis stream ended early');
+}
+
 export interface VideoJob {
   job_id: string;
   status: 'pending' | 'processing' | 'completed' | 'failed';
@@ -28,6 +28,7 @@ export interface CandidateInfo {
 export interface ChatContext {
   candidateName: string;
   jobTitle: string;
+  jobKey?: string;
   skillGaps: SkillItem[];
   strengths: SkillItem[];
   recommendations: Recommendation[];